@@ -0,0 +1,375 @@
+"""
+FileDelete 基准测试
+
+在 tmpfs 上按固定随机种子生成可复现的合成目录树（宽目录、深目录、大量小文件、大量空目录），
+分别用 v1 FileDelete 和 v2 FileDeleteV2 端到端执行删除文件、删除空目录、删除小目录，
+统计耗时、文件系统调用次数和峰值内存。可选的高延迟文件系统层为每次调用增加固定延迟，模拟 rclone 挂载。
+
+每个用例在独立子进程中运行，子进程需要能导入 MoviePilot 的 app 包：
+    python benchmarks/filedelete_bench.py --moviepilot /path/to/MoviePilot
+    python benchmarks/filedelete_bench.py --moviepilot ... --fs local,rclone --trees wide,deep --impls v2
+    python benchmarks/filedelete_bench.py --moviepilot ... --save base.json
+    python benchmarks/filedelete_bench.py --moviepilot ... --baseline base.json --tolerance 10
+
+插件的数据目录、配置保存都被替换为临时目录和空操作，不会影响 MoviePilot 中已安装插件的数据。
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+REPO = Path(__file__).resolve().parent.parent
+IMPLS = {
+    "v1": (REPO / "plugins" / "filedelete", "FileDelete"),
+    "v2": (REPO / "plugins.v2" / "filedelete", "FileDeleteV2"),
+}
+OPS = {
+    "files": {"delete_files_enabled": True},
+    "empty_dirs": {"delete_empty_dirs": True},
+    "small_dirs": {"delete_small_dirs": True},
+}
+# 小于该值（MB）的文件和目录会被删除
+THRESHOLD_MB = 1
+# 模拟 rclone 挂载时每次调用增加的延迟（秒）
+FS_LATENCY = {
+    "local": {},
+    "rclone": {"scandir": 0.010, "stat": 0.002, "open": 0.002, "unlink": 0.015, "rmdir": 0.015},
+}
+RESULT_PREFIX = "BENCH_RESULT "
+
+
+def _file(path: Path, size: int):
+    # 稀疏文件，st_size 与真实文件一致，不占用 tmpfs 空间
+    with open(path, "wb") as f:
+        f.truncate(size)
+
+
+def _mixed_size(rng: random.Random) -> int:
+    # 八成小于阈值的小文件，两成大文件
+    if rng.random() < 0.8:
+        return rng.randint(1, 512) * 1024
+    return rng.randint(2, 8) * 1024 * 1024
+
+
+def build_wide(root: Path, rng: random.Random, scale: float):
+    for i in range(int(500 * scale)):
+        directory = root / f"show{i:05d}"
+        directory.mkdir()
+        for j in range(4):
+            _file(directory / f"file{j}.mkv", _mixed_size(rng))
+
+
+def build_deep(root: Path, rng: random.Random, scale: float):
+    for i in range(int(20 * scale)):
+        directory = root / f"chain{i:03d}"
+        for level in range(30):
+            directory = directory / f"level{level:02d}"
+            directory.mkdir(parents=True)
+            if rng.random() < 0.5:
+                _file(directory / "file.bin", _mixed_size(rng))
+
+
+def build_small_files(root: Path, rng: random.Random, scale: float):
+    for i in range(20):
+        directory = root / f"album{i:02d}"
+        directory.mkdir()
+        for j in range(int(200 * scale)):
+            _file(directory / f"track{j:04d}.jpg", rng.randint(1, 64) * 1024)
+
+
+def build_empty_dirs(root: Path, rng: random.Random, scale: float):
+    for i in range(int(100 * scale)):
+        for j in range(3):
+            for k in range(3):
+                (root / f"season{i:04d}" / f"disc{j}" / f"extra{k}").mkdir(parents=True)
+        # 少数目录保留一个大文件，不能整棵删除
+        if rng.random() < 0.1:
+            _file(root / f"season{i:04d}" / "movie.mkv", 4 * 1024 * 1024)
+
+
+TREES: Dict[str, Callable[[Path, random.Random, float], None]] = {
+    "wide": build_wide,
+    "deep": build_deep,
+    "small_files": build_small_files,
+    "empty_dirs": build_empty_dirs,
+}
+
+
+class _Entry:
+    """
+    包装 DirEntry：首次 stat 时计数并增加延迟，之后与 DirEntry 一样使用缓存
+    """
+    __slots__ = ("_entry", "_layer", "_stated", "name", "path")
+
+    def __init__(self, entry: os.DirEntry, layer: "FsLayer"):
+        self._entry = entry
+        self._layer = layer
+        self._stated = set()
+        self.name = entry.name
+        self.path = entry.path
+
+    def __fspath__(self):
+        return self.path
+
+    def inode(self):
+        return self._entry.inode()
+
+    def is_dir(self, *, follow_symlinks=True):
+        return self._entry.is_dir(follow_symlinks=follow_symlinks)
+
+    def is_file(self, *, follow_symlinks=True):
+        return self._entry.is_file(follow_symlinks=follow_symlinks)
+
+    def is_symlink(self):
+        return self._entry.is_symlink()
+
+    def stat(self, *, follow_symlinks=True):
+        if follow_symlinks not in self._stated:
+            self._stated.add(follow_symlinks)
+            self._layer.hit("stat")
+        return self._entry.stat(follow_symlinks=follow_symlinks)
+
+
+class _Scandir:
+    def __init__(self, iterator, layer: "FsLayer"):
+        self._iterator = iterator
+        self._layer = layer
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return _Entry(next(self._iterator), self._layer)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._iterator.close()
+
+
+class FsLayer:
+    """
+    替换 os 模块中的文件系统调用，按类别统计调用次数，并按 latency 为每次调用增加延迟
+    必须在插件模块导入之后安装：dirfd 导入时据 os.supports_dir_fd 判断平台能力
+    """
+
+    # os 函数名 -> 统计类别
+    _CALLS = {"scandir": "scandir", "listdir": "scandir", "stat": "stat", "lstat": "stat",
+              "open": "open", "unlink": "unlink", "remove": "unlink", "rmdir": "rmdir", "rename": "rename"}
+
+    def __init__(self, latency: Dict[str, float]):
+        self.latency = latency
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        self._saved: Dict[str, Callable] = {}
+
+    def hit(self, kind: str):
+        with self._lock:
+            self.counts[kind] += 1
+        delay = self.latency.get(kind)
+        if delay:
+            time.sleep(delay)
+
+    def _wrap(self, name: str, real: Callable) -> Callable:
+        kind = self._CALLS[name]
+        if name == "scandir":
+            def scandir(*args, **kwargs):
+                self.hit(kind)
+                return _Scandir(real(*args, **kwargs), self)
+            return scandir
+
+        def call(*args, **kwargs):
+            self.hit(kind)
+            return real(*args, **kwargs)
+        return call
+
+    def install(self):
+        for name in self._CALLS:
+            self._saved[name] = getattr(os, name)
+            setattr(os, name, self._wrap(name, self._saved[name]))
+
+    def uninstall(self):
+        for name, real in self._saved.items():
+            setattr(os, name, real)
+        self._saved.clear()
+
+
+def _load(impl: str):
+    path, class_name = IMPLS[impl]
+    module_name = f"filedelete_bench_{impl}"
+    spec = importlib.util.spec_from_file_location(module_name, path / "__init__.py",
+                                                  submodule_search_locations=[str(path)])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return getattr(module, class_name)
+
+
+def run_child(impl: str, root: str, op: str, fs: str, data_dir: str) -> dict:
+    """
+    子进程内执行一个用例：配置插件、安装文件系统层后计时执行一次删除
+    """
+    plugin_class = _load(impl)
+    plugin = plugin_class()
+    plugin.get_data_path = lambda: Path(data_dir)
+    plugin.update_config = lambda *args, **kwargs: None
+    plugin.save_data = lambda *args, **kwargs: None
+    config = {"enabled": False, "onlyonce": False, "monitor_dirs": root, "keywords": "", "cron": "",
+              "small_dir_size_threshold": THRESHOLD_MB, "scan_workers": 4,
+              # v2 不做限速，只比较实现本身
+              "rate_limit": "1000000", "burst": "1000000", "max_inflight": 4, **OPS[op]}
+    layer = FsLayer(FS_LATENCY[fs])
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if impl == "v1":
+        plugin.init_plugin(config)
+        layer.install()
+        started = time.perf_counter()
+        # 未启用时 v1 不登记监控目录，直接传入
+        plugin.run_enabled_deletion_methods(paths=[root])
+    else:
+        asyncio.run(plugin.init_plugin(config))
+        layer.install()
+        started = time.perf_counter()
+        asyncio.run(plugin.run_enabled_deletion_methods())
+    wall = time.perf_counter() - started
+    layer.uninstall()
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"wall": wall, "syscalls": dict(layer.counts),
+            "peak_rss_kb": rss_peak, "rss_growth_kb": rss_peak - rss_before}
+
+
+def _tmpfs_base() -> str:
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+    return tempfile.gettempdir()
+
+
+def run_case(args, tree: str, op: str, fs: str, impl: str, workdir: Path) -> dict:
+    runs = []
+    for _ in range(args.repeat):
+        root = workdir / "tree"
+        data_dir = workdir / "data"
+        shutil.rmtree(root, ignore_errors=True)
+        shutil.rmtree(data_dir, ignore_errors=True)
+        root.mkdir()
+        data_dir.mkdir()
+        TREES[tree](root, random.Random(args.seed), args.scale)
+        env = dict(os.environ)
+        if args.moviepilot:
+            env["PYTHONPATH"] = os.pathsep.join(filter(None, [args.moviepilot, env.get("PYTHONPATH")]))
+        proc = subprocess.run([sys.executable, __file__, "--child", json.dumps([impl, str(root), op, fs,
+                                                                              str(data_dir)])],
+                              env=env, stdout=subprocess.PIPE, stderr=None if args.verbose else subprocess.DEVNULL,
+                              text=True)
+        lines = [line for line in proc.stdout.splitlines() if line.startswith(RESULT_PREFIX)]
+        if proc.returncode != 0 or not lines:
+            raise RuntimeError(f"{tree}/{op}/{fs}/{impl} 运行失败，退出码 {proc.returncode}，加 --verbose 查看输出")
+        runs.append(json.loads(lines[-1][len(RESULT_PREFIX):]))
+    syscalls = runs[-1]["syscalls"]
+    return {
+        "tree": tree, "op": op, "fs": fs, "impl": impl,
+        "wall": statistics.median(run["wall"] for run in runs),
+        "syscalls": syscalls,
+        "syscalls_total": sum(syscalls.values()),
+        "peak_rss_kb": max(run["peak_rss_kb"] for run in runs),
+        "rss_growth_kb": max(run["rss_growth_kb"] for run in runs),
+    }
+
+
+def _key(result: dict) -> str:
+    return "/".join((result["tree"], result["op"], result["fs"], result["impl"]))
+
+
+def print_table(results: List[dict]):
+    header = f"{'用例':<36}{'耗时(s)':>10}{'调用数':>9}{'scandir':>9}{'stat':>8}{'unlink':>8}{'rmdir':>8}" \
+             f"{'峰值RSS(MB)':>13}{'增长(MB)':>10}"
+    print(header)
+    for result in results:
+        syscalls = result["syscalls"]
+        print(f"{_key(result):<36}{result['wall']:>10.3f}{result['syscalls_total']:>9}"
+              f"{syscalls.get('scandir', 0):>9}{syscalls.get('stat', 0):>8}{syscalls.get('unlink', 0):>8}"
+              f"{syscalls.get('rmdir', 0):>8}{result['peak_rss_kb'] / 1024:>13.1f}"
+              f"{result['rss_growth_kb'] / 1024:>10.1f}")
+
+
+def compare(results: List[dict], baseline_path: str, tolerance: float) -> List[str]:
+    """
+    与保存的基线对比，耗时、调用数或内存增长超过容差百分比的用例视为退化
+    """
+    baseline = {_key(result): result for result in json.loads(Path(baseline_path).read_text(encoding="utf-8"))}
+    regressions = []
+    for result in results:
+        base: Optional[dict] = baseline.get(_key(result))
+        if not base:
+            continue
+        for field in ("wall", "syscalls_total", "rss_growth_kb"):
+            # 很小的基数上百分比没有意义，内存增长按 1MB、耗时按 10ms 兜底
+            floor = {"wall": 0.01, "syscalls_total": 1, "rss_growth_kb": 1024}[field]
+            if result[field] > max(base[field], floor) * (1 + tolerance / 100):
+                regressions.append(f"{_key(result)} {field}: {base[field]} -> {result[field]}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FileDelete v1/v2 基准测试")
+    parser.add_argument("--moviepilot", help="MoviePilot 源码根目录（包含 app 包），默认使用当前 PYTHONPATH")
+    parser.add_argument("--trees", default=",".join(TREES), help="目录树类型，逗号分隔")
+    parser.add_argument("--ops", default=",".join(OPS), help="删除操作，逗号分隔")
+    parser.add_argument("--fs", default="local,rclone", help="文件系统层：local 不加延迟，rclone 模拟高延迟挂载")
+    parser.add_argument("--impls", default=",".join(IMPLS), help="要测试的实现，逗号分隔")
+    parser.add_argument("--scale", type=float, default=1.0, help="目录树规模倍数")
+    parser.add_argument("--seed", type=int, default=20240501, help="生成目录树的随机种子")
+    parser.add_argument("--repeat", type=int, default=3, help="每个用例重复次数，耗时取中位数")
+    parser.add_argument("--base", default=_tmpfs_base(), help="生成目录树的位置，默认 /dev/shm")
+    parser.add_argument("--save", help="把结果保存为 JSON，作为之后对比的基线")
+    parser.add_argument("--baseline", help="与之前保存的结果对比，有退化时退出码为 1")
+    parser.add_argument("--tolerance", type=float, default=10, help="允许的退化百分比")
+    parser.add_argument("--verbose", action="store_true", help="显示子进程输出")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(RESULT_PREFIX + json.dumps(run_child(*json.loads(args.child))), flush=True)
+        return
+
+    results = []
+    workdir = Path(tempfile.mkdtemp(prefix="filedelete-bench-", dir=args.base))
+    try:
+        for tree in args.trees.split(","):
+            for op in args.ops.split(","):
+                for fs in args.fs.split(","):
+                    for impl in args.impls.split(","):
+                        results.append(run_case(args, tree, op, fs, impl, workdir))
+                        if args.verbose:
+                            print_table(results[-1:])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print_table(results)
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"退化: {line}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,70 @@
 import os
 import asyncio
-from pathlib import Path
-from typing import List, Dict, Any, Tuple
+import json
+import threading
+import time
+from contextlib import suppress
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Tuple, Iterator, Optional, Callable
 from app.plugins import _PluginV2Base
 from app.core.config import settings
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-import random
+
+from .checkpoint import Checkpoint
+from .dirfd import DirFds
+from .index import ScanIndex
+from .inodes import InodeLedger, tree_size
+from .matcher import KeywordMatcher
+from .metrics import RunMetrics, describe_bytes, render_page
+from .rules import Rule, RuleSet, parse_rules
+from .ratelimit import MountLimiter, TokenBucket, parse_legacy_delay
+from .scanner import DirNode, scan_tree, entry_size
+from .trash import TRASH_DIRNAME, Trash, list_runs, purge, restore
+
+
+def _next_batch(events: Iterator, limit: int) -> list:
+    """
+    推进扫描流水线取出一批事件，遇到目录完成事件即返回：
+    目录在调用方处理完之前，扫描器不能继续向上汇总
+    """
+    batch = []
+    for event in events:
+        batch.append(event)
+        if event[1] is None or len(batch) >= limit:
+            break
+    return batch
+
+
+def _apply_discards(discards: List[Tuple[DirNode, int]]):
+    """
+    把已删除的文件登记到所属目录；只能在扫描线程未推进流水线时调用，
+    扫描线程汇总子树大小时会修改同一批目录节点
+    """
+    for node, size in discards:
+        node.discard(size)
+    discards.clear()
+
+
+def _list_dir(path: str) -> List[os.DirEntry]:
+    with os.scandir(path) as it:
+        return list(it)
+
 
 class FileDeleteV2(_PluginV2Base):
     plugin_name = "云盘无用文件删除"
     plugin_desc = "自定义文件类型从源目录删除，包括可选的空目录。"
     plugin_icon = "https://raw.githubusercontent.com/guyue2005/MoviePilot-Plugins/main/icons/delete.png"
-    plugin_version = "2.0"
+    plugin_version = "2.21"
     plugin_author = "guyue2005"
     author_url = "https://github.com/guyue2005"
     plugin_order = 30
     auth_level = 1
 
+    # 每次从扫描线程取回的最大事件数
+    _SCAN_BATCH = 200
+    # 逐个文件的日志只在 debug 级别输出，info 级别每删除这么多个文件输出一次进度
+    _LOG_EVERY = 1000
+
     def __init__(self):
         super().__init__()
         self._scheduler = None
@@ -24,12 +72,31 @@ class FileDeleteV2(_PluginV2Base):
         self._onlyonce = False
         self._monitor_dirs: List[str] = []
         self._keywords: List[str] = []
+        self._matcher = KeywordMatcher([TRASH_DIRNAME])
+        self._rules_text = ""
+        self._file_rules = RuleSet([])
         self._delete_files_enabled = True
         self._delete_empty_dirs = False
         self._delete_small_dirs = False
         self._small_dir_size_threshold = 10
+        # 文件最小保留天数，未到时不删除，避免删除仍在下载的文件
+        self._min_file_age = 0.0
+        # 目录大小按 inode 去重计算，硬链接不重复计入
+        self._unique_sizes = False
         self._cron = ""
         self._delay = "20,1-10"
+        self._rate_limit = 0.0
+        self._burst = 0
+        self._max_inflight = 4
+        self._incremental = False
+        self._stop_event = threading.Event()
+        # 正在进行或最近一次运行的统计，以及按硬链接计算释放空间的记录
+        self._metrics: Optional[RunMetrics] = None
+        self._inodes = InodeLedger()
+        # 删除改为移入回收站，超过保留天数后定时清除
+        self._trash = False
+        self._trash_retention = 7.0
+        self._trash_purge_cron = "0 5 * * *"
 
     async def init_plugin(self, config: dict = None):
         if config:
@@ -37,32 +104,68 @@ class FileDeleteV2(_PluginV2Base):
             self._onlyonce = config.get("onlyonce", False)
             self._monitor_dirs = [line.strip() for line in config.get("monitor_dirs", "").splitlines() if line.strip()]
             self._keywords = [kw.strip() for kw in config.get("keywords", "").split(",") if kw.strip()]
+            # 回收站目录始终排除
+            self._matcher = KeywordMatcher(self._keywords + [TRASH_DIRNAME])
             self._delete_files_enabled = config.get("delete_files_enabled", False)
             self._delete_empty_dirs = config.get("delete_empty_dirs", False)
             self._delete_small_dirs = config.get("delete_small_dirs", False)
             self._small_dir_size_threshold = int(config.get("small_dir_size_threshold", 10))
+            self._min_file_age = max(0.0, float(config.get("min_file_age") or 0))
+            self._unique_sizes = config.get("unique_sizes", False)
             self._cron = config.get("cron", "")
             self._delay = config.get("delay", "20,1-10")
+            self._rate_limit = float(config.get("rate_limit") or 0)
+            self._burst = int(config.get("burst") or 0)
+            self._max_inflight = max(1, int(config.get("max_inflight") or 4))
+            self._incremental = config.get("incremental", False)
+            self._rules_text = config.get("rules", "")
+            self._file_rules = self._compile_rules()
+            self._trash = config.get("trash", False)
+            self._trash_retention = max(0.0, float(config.get("trash_retention") or 7))
+            self._trash_purge_cron = config.get("trash_purge_cron") or "0 5 * * *"
 
         if self._onlyonce:
             await self.run_enabled_deletion_methods()
             self._onlyonce = False
             self.update_config({"onlyonce": False})
 
-        if self._enabled and self._cron:
+        if self._enabled and (self._cron or self._trash):
             asyncio.create_task(self._cron_job())
 
+    def _compile_rules(self) -> RuleSet:
+        """
+        编译文件删除规则；未配置规则时沿用按大小阈值删除的单条规则
+        最小保留天数对所有规则生效，规则自身的年龄条件更短时按最小保留天数计
+        """
+        rules, errors = parse_rules(self._rules_text)
+        for error in errors:
+            self.logger.error(error)
+        if rules:
+            self.logger.info(f"已加载 {len(rules.rules)} 条文件删除规则")
+            return rules.with_min_age(self._min_file_age * 86400)
+        return RuleSet([Rule("file", max_size=self._small_dir_size_threshold * 1024 * 1024,
+                             min_age=self._min_file_age * 86400)])
+
     async def _cron_job(self):
-        if not self._cron:
-            return
         scheduler = AsyncIOScheduler(timezone=settings.TZ)
-        cron_parts = self._cron.split()
+        self._add_cron_job(scheduler, self._cron, self.run_enabled_deletion_methods)
+        if self._trash:
+            self._add_cron_job(scheduler, self._trash_purge_cron, self.purge_trash)
+        if not scheduler.get_jobs():
+            return
+        scheduler.start()
+        self._scheduler = scheduler
+
+    def _add_cron_job(self, scheduler: AsyncIOScheduler, cron: str, func: Callable):
+        if not cron:
+            return
+        cron_parts = cron.split()
         if len(cron_parts) != 5:
-            self.logger.error(f"Cron 表达式格式不正确: {self._cron}")
+            self.logger.error(f"Cron 表达式格式不正确: {cron}")
             return
         minute, hour, day, month, day_of_week = cron_parts
         scheduler.add_job(
-            self.run_enabled_deletion_methods,
+            func,
             trigger='cron',
             minute=minute,
             hour=hour,
@@ -70,80 +173,357 @@ class FileDeleteV2(_PluginV2Base):
             month=month,
             day_of_week=day_of_week
         )
-        scheduler.start()
-        self._scheduler = scheduler
 
     async def run_enabled_deletion_methods(self):
-        if self._delete_files_enabled:
-            await self.delete_files()
-        if self._delete_empty_dirs:
-            await self.delete_empty_dirs()
-        if self._delete_small_dirs:
-            await self.delete_small_dirs()
+        await self._run_deletion(files=self._delete_files_enabled,
+                                 empty_dirs=self._delete_empty_dirs,
+                                 small_dirs=self._delete_small_dirs)
 
     async def delete_files(self):
-        self.logger.info("开始删除文件 ...")
-        size_threshold = self._small_dir_size_threshold * 1024 * 1024
-        for mon_path in self._monitor_dirs:
-            p = Path(mon_path)
-            if not p.exists():
-                self.logger.error(f"监控目录不存在: {mon_path}")
-                continue
-            for file in p.rglob("*"):
-                if file.is_file():
-                    if any(kw in str(file) for kw in self._keywords):
-                        continue
-                    if file.stat().st_size > size_threshold:
-                        continue
-                    try:
-                        file.unlink()
-                        self.logger.info(f"删除文件: {file}")
-                        await asyncio.sleep(self._get_delay())
-                    except Exception as e:
-                        self.logger.error(f"删除失败: {file}, {e}")
+        await self._run_deletion(files=True)
 
     async def delete_empty_dirs(self):
-        self.logger.info("开始删除空目录 ...")
-        for mon_path in self._monitor_dirs:
-            for root, dirs, _ in os.walk(mon_path, topdown=False):
-                for dir_name in dirs:
-                    dir_path = os.path.join(root, dir_name)
-                    if any(kw in dir_path for kw in self._keywords):
-                        continue
-                    if os.path.isdir(dir_path) and not os.listdir(dir_path):
-                        try:
-                            os.rmdir(dir_path)
-                            self.logger.info(f"删除空目录: {dir_path}")
-                        except Exception as e:
-                            self.logger.error(f"删除失败: {dir_path}, {e}")
+        await self._run_deletion(empty_dirs=True)
 
     async def delete_small_dirs(self):
-        self.logger.info("开始删除小目录 ...")
+        await self._run_deletion(small_dirs=True)
+
+    async def _run_deletion(self, files: bool = False, empty_dirs: bool = False, small_dirs: bool = False):
+        """
+        每个监控目录只遍历一次，扫描、过滤、删除组成惰性的生成器流水线，内存占用与目录树规模无关。
+        删除操作按挂载点经令牌桶限速，并允许一定数量的删除同时进行；
+        所有文件系统调用都在专用线程池中执行，事件循环不会被慢速挂载阻塞，stop_service 时中止；
+        已处理完成的目录定期写入断点记录，中止或重启后下次运行从中断处继续
+        """
+        if files:
+            self.logger.info("开始删除文件 ...")
+        if empty_dirs:
+            self.logger.info("开始删除空目录 ...")
+        if small_dirs:
+            self.logger.info("开始删除小目录 ...")
         threshold = self._small_dir_size_threshold * 1024 * 1024
-        for mon_path in self._monitor_dirs:
-            for root, dirs, _ in os.walk(mon_path, topdown=False):
-                for dir_name in dirs:
-                    dir_path = os.path.join(root, dir_name)
-                    if any(kw in dir_path for kw in self._keywords):
+        rate, burst = self._rate_settings()
+        limiter = MountLimiter(rate, burst, self._max_inflight)
+        self._stop_event.clear()
+        # 扫描占用一个线程，其余线程用于删除；线程池属于本次运行，定时任务与立即运行重叠时互不影响
+        executor = ThreadPoolExecutor(max_workers=self._max_inflight + 1, thread_name_prefix="FileDeleteV2")
+        index = await self._io(executor, self._open_index, files, empty_dirs, small_dirs) \
+            if self._incremental else None
+        checkpoint = await self._io(executor, self._open_checkpoint, files, empty_dirs, small_dirs)
+        trash = Trash(self._monitor_dirs) if self._trash else None
+        metrics = self._metrics = RunMetrics(trash=trash is not None)
+        self._inodes = InodeLedger()
+        try:
+            for mon_path in self._monitor_dirs:
+                if self._stop_event.is_set():
+                    break
+                if not await self._io(executor, os.path.isdir, mon_path):
+                    self.logger.error(f"监控目录不存在: {mon_path}")
+                    continue
+                # 查找挂载点需要逐级 stat 上级目录，同样放到线程池中执行
+                bucket, inflight = await self._io(executor, limiter.get, mon_path)
+                events = scan_tree(mon_path,
+                                   onerror=lambda e: self.logger.error(f"读取目录失败: {e}"),
+                                   stat_files=files or small_dirs,
+                                   matcher=self._matcher,
+                                   index=index,
+                                   done=checkpoint.resume_points if checkpoint else None,
+                                   metrics=metrics,
+                                   unique_sizes=self._unique_sizes)
+                if files:
+                    events = self._filter_files(events)
+                else:
+                    events = ((node, None, 0) for node, entry in events if entry is None)
+                await self._consume(executor, events, bucket, inflight, empty_dirs, small_dirs, threshold,
+                                    checkpoint, trash)
+            if self._stop_event.is_set():
+                self.logger.info("插件已停止，删除任务中止，进度已保存，下次运行时继续")
+        finally:
+            if index:
+                # 中途停止时保留未访问到的记录
+                await self._io(executor, index.close, not self._stop_event.is_set())
+            if checkpoint:
+                await self._io(executor, checkpoint.save if self._stop_event.is_set() else checkpoint.finish)
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._finish_metrics(metrics)
+            if trash:
+                self.logger.info(f"本次删除的内容已移入回收站，批次 {trash.run_id}，保留 {self._trash_retention} 天")
+
+    def _finish_metrics(self, metrics: RunMetrics):
+        """
+        运行结束后保存统计，插件重启后详情页仍可查看
+        """
+        metrics.finish()
+        data = metrics.to_dict()
+        self.logger.info(f"本次运行访问 {data['dirs']} 个目录、{data['files']} 个文件，stat {data['stat_calls']} 次，"
+                         f"删除 {data['unlinks']} 个文件、{data['rmdirs']} 个目录，"
+                         f"{describe_bytes(data)}，耗时 {data['duration']} 秒"
+                         f"（列目录 {data['list_time']} 秒，stat {data['stat_time']} 秒，删除 {data['unlink_time']} 秒）")
+        self.save_data("last_run", data)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        正在进行或最近一次运行的统计
+        """
+        if self._metrics:
+            return self._metrics.to_dict()
+        return self.get_data("last_run") or {}
+
+    async def purge_trash(self):
+        """
+        清除超过保留天数的回收站批次，在定时任务中于低峰时段运行
+        """
+        purged = await self._io(None, purge, self._monitor_dirs, self._trash_retention,
+                                lambda func, path, exc: self.logger.error(f"清理回收站失败: {path}, {exc[1]}"))
+        if purged:
+            self.logger.info(f"回收站清理完成，共清除了 {purged} 个超过 {self._trash_retention} 天的批次")
+
+    def list_trash(self) -> List[Dict[str, Any]]:
+        """
+        回收站中的运行批次
+        """
+        return list_runs(self._monitor_dirs)
+
+    def restore_trash(self, run: str) -> Dict[str, Any]:
+        """
+        把一个运行批次移入回收站的内容恢复到原位置
+        """
+        if not any(item["run"] == run for item in self.list_trash()):
+            return {"success": False, "message": f"回收站中没有批次 {run}"}
+        restored, skipped = restore(self._monitor_dirs, run,
+                                    onerror=lambda e: self.logger.error(f"恢复回收站文件失败: {e}"))
+        self.logger.info(f"回收站批次 {run} 恢复完成，恢复 {restored} 个文件，{skipped} 个文件因原位置已存在或出错保留在回收站")
+        return {"success": True, "message": f"恢复 {restored} 个文件，跳过 {skipped} 个",
+                "restored": restored, "skipped": skipped}
+
+    def get_api(self) -> List[Dict[str, Any]]:
+        return [{
+            "path": "/metrics",
+            "endpoint": self.get_metrics,
+            "methods": ["GET"],
+            "summary": "运行统计",
+            "description": "获取正在进行或最近一次删除任务的统计",
+        }, {
+            "path": "/trash",
+            "endpoint": self.list_trash,
+            "methods": ["GET"],
+            "summary": "回收站批次",
+            "description": "列出回收站中保留的运行批次",
+        }, {
+            "path": "/trash/restore",
+            "endpoint": self.restore_trash,
+            "methods": ["POST"],
+            "summary": "恢复回收站批次",
+            "description": "把指定运行批次移入回收站的文件恢复到原位置",
+        }]
+
+    def get_page(self) -> List[dict]:
+        return render_page(self.get_metrics())
+
+    def _rules_fingerprint(self, files: bool, empty_dirs: bool, small_dirs: bool) -> str:
+        return json.dumps([files, empty_dirs, small_dirs, self._small_dir_size_threshold, self._keywords,
+                           self._rules_text, self._min_file_age, self._unique_sizes])
+
+    def _open_checkpoint(self, files: bool, empty_dirs: bool, small_dirs: bool) -> Optional[Checkpoint]:
+        """
+        读取断点记录，删除规则或监控目录变化时从头开始
+        """
+        key = json.dumps([self._rules_fingerprint(files, empty_dirs, small_dirs), self._monitor_dirs])
+        try:
+            checkpoint = Checkpoint(self.get_data_path() / "checkpoint.json", key, self._monitor_dirs)
+        except Exception as e:
+            self.logger.error(f"读取断点记录失败: {e}")
+            return None
+        if checkpoint.resumed:
+            self.logger.info(f"上次删除任务未完成，从中断处继续，跳过 {len(checkpoint.resume_points)} 个已处理的目录")
+        return checkpoint
+
+    def _open_index(self, files: bool, empty_dirs: bool, small_dirs: bool) -> Optional[ScanIndex]:
+        """
+        打开增量扫描索引，删除规则变化时索引自动失效
+        """
+        fingerprint = self._rules_fingerprint(files, empty_dirs, small_dirs)
+        # 小目录的保留天数按 mtime 判断
+        now = time.time()
+        mtime_age = max(self._file_rules.max_age(), self._min_file_age * 86400)
+        ctime_age = self._file_rules.max_age(ctime=True)
+        try:
+            return ScanIndex(self.get_data_path() / "scan_index.db", fingerprint,
+                             mtime_cutoff=now - mtime_age if mtime_age else None,
+                             ctime_cutoff=now - ctime_age if ctime_age else None)
+        except Exception as e:
+            self.logger.error(f"打开扫描索引失败，本次全量扫描: {e}")
+            return None
+
+    async def _consume(self, executor: ThreadPoolExecutor,
+                       events: Iterator[Tuple[DirNode, Optional[os.DirEntry], int]],
+                       bucket: TokenBucket, inflight: asyncio.Semaphore,
+                       empty_dirs: bool, small_dirs: bool, threshold: int,
+                       checkpoint: Optional[Checkpoint] = None, trash: Optional[Trash] = None):
+        """
+        在线程池中分批推进扫描流水线，在事件循环中调度删除；传入 trash 时移入回收站
+        """
+        pending: Dict[DirNode, List[asyncio.Task]] = {}
+        # 删除任务与扫描线程并发执行，删除结果先排队，扫描线程空闲时再登记到目录节点
+        discards: List[Tuple[DirNode, int]] = []
+        fds = DirFds(self._metrics, trash)
+        try:
+            while not self._stop_event.is_set():
+                batch = await self._io(executor, _next_batch, events, self._SCAN_BATCH)
+                _apply_discards(discards)
+                if not batch:
+                    break
+                for node, entry, size in batch:
+                    if entry is not None:
+                        await inflight.acquire()
+                        pending.setdefault(node, []).append(
+                            asyncio.create_task(self._delete_file(executor, bucket, inflight, fds,
+                                                                  node, entry, size, discards)))
                         continue
-                    size = sum(f.stat().st_size for f in Path(dir_path).glob("*") if f.is_file())
-                    if size < threshold:
-                        try:
-                            os.rmdir(dir_path)
-                            self.logger.info(f"删除小目录: {dir_path}")
-                        except Exception as e:
-                            self.logger.error(f"删除失败: {dir_path}, {e}")
-
-    def _get_delay(self) -> float:
-        """解析随机延时，例如 '20,1-10' 表示处理20个文件后随机延时1-10秒"""
+
+                    # 目录内的文件删除全部完成后，目录计数才准确
+                    tasks = pending.pop(node, None)
+                    if tasks:
+                        await asyncio.gather(*tasks)
+                    _apply_discards(discards)
+                    if node.parent is not None and not node.excluded and not self._stop_event.is_set():
+                        await self._process_dir(executor, node, bucket, fds, empty_dirs, small_dirs, threshold)
+                    # 目录处理完成，之后不会再删除其中的内容
+                    fds.release(node.path)
+                    # 中止时目录可能未按规则处理，不记为完成
+                    if checkpoint and not self._stop_event.is_set():
+                        checkpoint.complete(node)
+        finally:
+            remaining = [task for tasks in pending.values() for task in tasks]
+            if remaining:
+                await asyncio.gather(*remaining, return_exceptions=True)
+            fds.close()
+            # 扫描线程仍在推进流水线时（任务被取消）无法关闭生成器，交由垃圾回收
+            with suppress(ValueError):
+                await self._io(executor, events.close)
+
+    @staticmethod
+    async def _io(executor: Optional[ThreadPoolExecutor], func: Callable, *args) -> Any:
+        """
+        在本次运行的专用线程池中执行阻塞的文件系统调用，executor 为 None 时使用事件循环的默认线程池
+        """
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+    async def _process_dir(self, executor: ThreadPoolExecutor, node: DirNode, bucket: TokenBucket,
+                           fds: DirFds, empty_dirs: bool, small_dirs: bool, threshold: int):
+        """
+        目录完成事件：按规则删除空目录或小目录
+        """
+        # children 随文件、子目录的删除递减，空子树在一次遍历中逐级删除
+        if empty_dirs and node.children == 0:
+            await bucket.acquire()
+            if await self._remove_dir(executor, node, fds):
+                self.logger.debug(f"删除空目录: {node.path}")
+            return
+        # node.size 为自底向上汇总的子树大小，更小的子目录此前已被删除
+        if small_dirs and node.size < threshold and await self._clear_small_dir(executor, node, bucket, fds):
+            self.logger.debug(f"删除小目录: {node.path}")
+
+    async def _delete_file(self, executor: ThreadPoolExecutor, bucket: TokenBucket, inflight: asyncio.Semaphore,
+                           fds: DirFds, node: DirNode, entry: os.DirEntry, size: int,
+                           discards: List[Tuple[DirNode, int]]):
         try:
-            parts = self._delay.split(',')
-            if len(parts) == 2 and '-' in parts[1]:
-                min_sec, max_sec = map(int, parts[1].split('-'))
-                return random.randint(min_sec, max_sec)
-        except Exception:
-            pass
-        return 0
+            if self._stop_event.is_set():
+                return
+            await bucket.acquire()
+            # 同一目录下的文件共用父目录 fd，不再逐个解析完整路径
+            await self._io(executor, fds.unlink, entry.path)
+            discards.append((node, size))
+            self._metrics.freed(self._inodes.released(entry))
+            self.logger.debug(f"删除文件: {entry.path}")
+            if self._metrics.unlinks % self._LOG_EVERY == 0:
+                self.logger.info(f"已删除 {self._metrics.unlinks} 个文件，当前: {entry.path}")
+        except Exception as e:
+            self.logger.error(f"删除失败: {entry.path}, {e}")
+        finally:
+            inflight.release()
+
+    def _rate_settings(self) -> Tuple[float, int]:
+        """
+        返回 (每秒删除数, 突发数)；未设置每秒删除数时按旧的随机延时配置换算
+        """
+        if self._rate_limit > 0:
+            return self._rate_limit, self._burst or max(1, int(self._rate_limit))
+        return parse_legacy_delay(self._delay) or (0, 1)
+
+    def _filter_files(self, events: Iterator[Tuple[DirNode, Optional[os.DirEntry]]]
+                      ) -> Iterator[Tuple[DirNode, Optional[os.DirEntry], int]]:
+        """
+        过滤阶段：只放行命中删除规则的文件，目录完成事件原样透传
+        """
+        now = time.time()
+        for node, entry in events:
+            if entry is None:
+                yield node, None, 0
+                continue
+            # 命中的目录已在扫描时剪枝，这里只需从目录的匹配状态继续匹配文件名
+            if self._matcher.child(node.state, entry.name)[1]:
+                continue
+            # DirEntry 已缓存 stat 结果，大小和时间条件不再产生系统调用
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            if self._file_rules.match(entry.name, stat, now) is not None:
+                yield node, entry, tree_size(stat, self._unique_sizes)
+
+    async def _remove_dir(self, executor: ThreadPoolExecutor, node: DirNode, fds: DirFds) -> bool:
+        try:
+            await self._io(executor, fds.rmdir, node.path)
+            node.removed = True
+            return True
+        except Exception as e:
+            self.logger.error(f"删除失败: {node.path}, {e}")
+            return False
+
+    async def _clear_small_dir(self, executor: ThreadPoolExecutor, node: DirNode, bucket: TokenBucket,
+                               fds: DirFds) -> bool:
+        """
+        清理小目录中剩余的直接文件后删除目录，只对命中的小目录重新列一次
+        """
+        if node.subdirs:
+            return False
+        try:
+            entries = await self._io(executor, _list_dir, node.path)
+        except OSError as e:
+            self.logger.error(f"读取目录失败: {node.path}, {e}")
+            return False
+        if any(self._matcher.child(node.state, entry.name)[1] for entry in entries):
+            return False
+        if self._min_file_age and await self._io(executor, self._has_young_file, entries):
+            return False
+        for entry in entries:
+            try:
+                # 删除前读取大小，stat 结果缓存在 DirEntry 中供计算释放空间
+                size = await self._io(executor, entry_size, entry, self._unique_sizes)
+                await bucket.acquire()
+                await self._io(executor, fds.unlink, entry.path)
+                # 目录完成事件处理期间扫描线程不推进，可以直接修改节点
+                node.discard(size)
+                self._metrics.freed(self._inodes.released(entry))
+            except Exception as e:
+                self.logger.error(f"删除失败: {entry.path}, {e}")
+                return False
+        await bucket.acquire()
+        return await self._remove_dir(executor, node, fds)
+
+    def _has_young_file(self, entries: List[os.DirEntry]) -> bool:
+        """
+        小目录中是否有未到最小保留天数的文件；stat 结果由 DirEntry 缓存，随后计算大小时复用
+        """
+        cutoff = time.time() - self._min_file_age * 86400
+        for entry in entries:
+            try:
+                if entry.stat().st_mtime > cutoff:
+                    return True
+            except OSError:
+                continue
+        return False
 
     def get_form(self) -> Tuple[List[dict], dict]:
         return [
@@ -186,7 +566,7 @@ class FileDeleteV2(_PluginV2Base):
                             {
                                 "component": "VCol",
                                 "props": {"cols": 12, "md": 4},
-                                "content": [{"component": "VTextField", "props": {"model": "small_dir_size_threshold", "label": "删除多大文件/目录 (MB)"}}]
+                                "content": [{"component": "VTextField", "props": {"model": "small_dir_size_threshold", "label": "删除多大文件/目录 (MB)", "placeholder": "小于此值的文件，或小于此值的目录连同其中文件，将被删除"}}]
                             }
                         ]
                     },
@@ -210,6 +590,16 @@ class FileDeleteV2(_PluginV2Base):
                             }
                         ]
                     },
+                    {
+                        "component": "VRow",
+                        "content": [
+                            {
+                                "component": "VCol",
+                                "props": {"cols": 12},
+                                "content": [{"component": "VTextarea", "props": {"model": "rules", "label": "文件删除规则", "rows": 3, "placeholder": "每行一条规则，条件以分号分隔，留空则删除小于设定容量的文件\nname=字幕图片;ext=nfo,jpg,png;max=5MB;age=7d\nname=旧日志;ext=log;age=30d;time=ctime\nname=样片;include=*sample*;exclude=*keep*;regex=...;min=0;max=200MB"}}]
+                            }
+                        ]
+                    },
                     {
                         "component": "VRow",
                         "content": [
@@ -221,7 +611,77 @@ class FileDeleteV2(_PluginV2Base):
                             {
                                 "component": "VCol",
                                 "props": {"cols": 12, "md": 4},
-                                "content": [{"component": "VTextField", "props": {"model": "delay", "label": "随机延时", "placeholder": "20,1-10"}}]
+                                "content": [{"component": "VTextField", "props": {"model": "delay", "label": "随机延时", "placeholder": "20,1-10，未设置每秒删除数时生效"}}]
+                            },
+                            {
+                                "component": "VCol",
+                                "props": {"cols": 12, "md": 4},
+                                "content": [{"component": "VSwitch", "props": {"model": "incremental", "label": "增量扫描"}}]
+                            }
+                        ]
+                    },
+                    {
+                        "component": "VRow",
+                        "content": [
+                            {
+                                "component": "VCol",
+                                "props": {"cols": 12, "md": 4},
+                                "content": [{"component": "VTextField", "props": {"model": "rate_limit", "label": "每秒删除数", "placeholder": "每个挂载点每秒最多删除次数，留空沿用随机延时"}}]
+                            },
+                            {
+                                "component": "VCol",
+                                "props": {"cols": 12, "md": 4},
+                                "content": [{"component": "VTextField", "props": {"model": "burst", "label": "突发数", "placeholder": "允许瞬时连续删除的次数"}}]
+                            },
+                            {
+                                "component": "VCol",
+                                "props": {"cols": 12, "md": 4},
+                                "content": [{"component": "VTextField", "props": {"model": "max_inflight", "label": "并发删除数", "placeholder": "每个挂载点同时进行的删除数，默认4"}}]
+                            }
+                        ]
+                    },
+                    {
+                        "component": "VRow",
+                        "content": [
+                            {
+                                "component": "VCol",
+                                "props": {"cols": 12, "md": 4},
+                                "content": [{"component": "VTextField", "props": {"model": "min_file_age", "label": "最小保留天数", "placeholder": "修改时间不足此天数的文件和小目录不删除，0为不限制"}}]
+                            },
+                            {
+                                "component": "VCol",
+                                "props": {"cols": 12, "md": 4},
+                                "content": [{"component": "VSwitch", "props": {"model": "unique_sizes", "label": "目录大小按硬链接去重"}}]
+                            }
+                        ]
+                    },
+                    {
+                        "component": "VRow",
+                        "content": [
+                            {
+                                "component": "VCol",
+                                "props": {"cols": 12, "md": 4},
+                                "content": [{"component": "VSwitch", "props": {"model": "trash", "label": "删除时移入回收站"}}]
+                            },
+                            {
+                                "component": "VCol",
+                                "props": {"cols": 12, "md": 4},
+                                "content": [{"component": "VTextField", "props": {"model": "trash_retention", "label": "回收站保留天数", "placeholder": "超过此天数的批次由定时任务清除，默认7"}}]
+                            },
+                            {
+                                "component": "VCol",
+                                "props": {"cols": 12, "md": 4},
+                                "content": [{"component": "VTextField", "props": {"model": "trash_purge_cron", "label": "回收站清理周期", "placeholder": "5位cron表达式，建议设在低峰时段"}}]
+                            }
+                        ]
+                    },
+                    {
+                        "component": "VRow",
+                        "content": [
+                            {
+                                "component": "VCol",
+                                "props": {"cols": 12},
+                                "content": [{"component": "VAlert", "props": {"type": "warning", "variant": "tonal", "text": "注意：删除全部目录会把整棵子树小于设定容量的目录连同其中的所有文件一起删除，不只是空目录；开启前请确认容量阈值，建议同时开启回收站"}}]
                             }
                         ]
                     }
@@ -233,14 +693,26 @@ class FileDeleteV2(_PluginV2Base):
             "monitor_dirs": "",
             "cron": "",
             "keywords": "",
+            "rules": "",
             "delete_files_enabled": False,
             "delete_empty_dirs": False,
             "delete_small_dirs": False,
             "small_dir_size_threshold": 10,
-            "delay": "20,1-10"
+            "min_file_age": 0,
+            "unique_sizes": False,
+            "delay": "20,1-10",
+            "rate_limit": "",
+            "burst": "",
+            "max_inflight": 4,
+            "incremental": False,
+            "trash": False,
+            "trash_retention": 7,
+            "trash_purge_cron": "0 5 * * *"
         }
 
     async def stop_service(self):
+        # 通知正在进行的删除任务中止，已提交的删除完成后即退出
+        self._stop_event.set()
         if self._scheduler:
             self._scheduler.remove_all_jobs()
             if self._scheduler.running:
@@ -0,0 +1,101 @@
+import json
+import os
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+from .scanner import DirNode
+
+
+class Checkpoint:
+    """
+    删除任务的断点记录，保存在插件数据目录下
+    记录已处理完成且保留下来的目录（监控目录下两层以内）及其子树大小，以及到目前为止的删除计数；
+    任务中断后再次运行时，删除规则和监控目录不变则跳过这些目录，从中断处继续。
+    已删除的目录不必记录，重新遍历时已不存在；某个一级目录完成后，其下的二级目录记录合并为一条
+    """
+
+    # 记录到监控目录下第几层
+    _DEPTH = 2
+    # 至少间隔多少秒写一次文件
+    _INTERVAL = 30
+    _KEYS = ("files", "empty_dirs", "small_dirs", "bytes")
+
+    def __init__(self, path: Path, key: str, roots: List[str]):
+        self.path = path
+        self._key = key
+        self._lock = threading.Lock()
+        self._tracked: List[Counter] = []
+        self._nested: Dict[str, List[str]] = {}
+        self._saved = time.monotonic()
+        self.done: Dict[str, int] = {}
+        self.carried = Counter()
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = None
+        if isinstance(data, dict) and data.get("key") == key:
+            self.done = data.get("done") or {}
+            self.carried = Counter(data.get("counts") or {})
+        for done_path in self.done:
+            parent_path = os.path.dirname(done_path)
+            if parent_path not in roots:
+                self._nested.setdefault(parent_path, []).append(done_path)
+        # 遍历时据此跳过的目录，运行中新完成的目录不影响
+        self.resume_points = dict(self.done)
+
+    @property
+    def resumed(self) -> bool:
+        return bool(self.resume_points)
+
+    def track(self, counts: Counter) -> Counter:
+        """
+        登记一个扫描单元的删除计数，写入断点时汇总
+        """
+        with self._lock:
+            self._tracked.append(counts)
+        return counts
+
+    def complete(self, node: DirNode):
+        """
+        目录处理完成（其后代均已处理）后调用
+        """
+        depth, parent = 0, node.parent
+        while parent is not None:
+            depth, parent = depth + 1, parent.parent
+        if depth == 0 or depth > self._DEPTH:
+            return
+        with self._lock:
+            if depth == 1:
+                for nested_path in self._nested.pop(node.path, ()):
+                    self.done.pop(nested_path, None)
+            if not node.removed:
+                if depth > 1:
+                    self._nested.setdefault(node.parent.path, []).append(node.path)
+                self.done[node.path] = node.size
+            if time.monotonic() - self._saved >= self._INTERVAL:
+                self._save()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        counts = {key: self.carried[key] + sum(counts[key] for counts in self._tracked) for key in self._KEYS}
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps({"key": self._key, "updated": int(time.time()),
+                                        "counts": counts, "done": self.done}, ensure_ascii=False),
+                            encoding="utf-8")
+        os.replace(tmp_path, self.path)
+        self._saved = time.monotonic()
+
+    def finish(self):
+        """
+        任务完整结束，删除断点记录
+        """
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
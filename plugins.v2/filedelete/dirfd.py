@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from .metrics import RunMetrics
+from .trash import Trash
+
+# 不支持 dir_fd 的平台退回完整路径
+_SUPPORTED = {os.open, os.stat, os.unlink, os.rmdir} <= os.supports_dir_fd
+
+
+class DirFds:
+    """
+    按目录缓存打开的目录 fd，同一目录下的 unlink/rmdir 只传文件名，
+    内核或 FUSE 挂载不必为每个文件重新解析整条路径；目录在检查和删除之间被替换时，操作仍落在原目录中
+    调用方在目录处理完成后 release，后序遍历时同时打开的 fd 数量不超过目录树深度；
+    传入 metrics 时登记每次删除的耗时；传入 trash 时文件移入回收站而不是删除
+    """
+
+    def __init__(self, metrics: Optional[RunMetrics] = None, trash: Optional[Trash] = None):
+        self._fds: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._metrics = metrics
+        self._trash = trash
+
+    def get(self, path: str) -> Optional[int]:
+        if not _SUPPORTED:
+            return None
+        with self._lock:
+            fd = self._fds.get(path)
+            if fd is None:
+                fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+                self._fds[path] = fd
+            return fd
+
+    def release(self, path: str):
+        with self._lock:
+            fd = self._fds.pop(path, None)
+        if fd is not None:
+            os.close(fd)
+
+    def close(self):
+        with self._lock:
+            fds, self._fds = list(self._fds.values()), {}
+        for fd in fds:
+            os.close(fd)
+
+    def _resolve(self, path: str):
+        parent, name = os.path.split(path)
+        fd = self.get(parent)
+        return (name, fd) if fd is not None else (path, None)
+
+    def unlink(self, path: str, expected_size: Optional[int] = None) -> bool:
+        """
+        通过父目录 fd 删除文件；传入 expected_size 时先确认大小未变化，不一致返回 False
+        """
+        name, fd = self._resolve(path)
+        if expected_size is not None and os.stat(name, dir_fd=fd).st_size != expected_size:
+            return False
+        started = time.perf_counter()
+        if self._trash is not None:
+            self._trash.move(path, name, fd)
+        else:
+            os.unlink(name, dir_fd=fd)
+        if self._metrics is not None:
+            self._metrics.deleted(time.perf_counter() - started)
+        return True
+
+    def rmdir(self, path: str):
+        """
+        通过父目录 fd 删除目录，并关闭目录自身的 fd
+        """
+        self.release(path)
+        if self._trash is not None:
+            self._trash.keep_dir(path)
+        name, fd = self._resolve(path)
+        started = time.perf_counter()
+        os.rmdir(name, dir_fd=fd)
+        if self._metrics is not None:
+            self._metrics.deleted(time.perf_counter() - started, is_dir=True)
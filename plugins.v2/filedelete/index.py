@@ -0,0 +1,87 @@
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+class ScanIndex:
+    """
+    增量扫描索引，保存在插件数据目录下的 SQLite 文件中
+    记录每个目录处理完成后的 mtime、子项计数、直接文件大小和保留的子目录名；
+    下次扫描时目录 mtime 未变化则直接复用记录，不再列出目录和 stat 其中的文件。
+    删除规则变化（fingerprint 不同）时整个索引失效。
+    规则带年龄条件时按 mtime、ctime 分别传入截止时间（早于该时间的文件已满足对应的所有年龄条件）：
+    目录内最新的文件不早于截止时间时，其中可能有文件只因年龄未到而保留，不记录 mtime，下次运行重新列出；
+    最新文件早于截止时间的目录之后整体跳过
+    """
+
+    # 累积多少条写入后提交一次
+    _FLUSH_SIZE = 500
+
+    def __init__(self, db_path: Path, fingerprint: str,
+                 mtime_cutoff: Optional[float] = None, ctime_cutoff: Optional[float] = None):
+        self._lock = threading.Lock()
+        self._mtime_cutoff = mtime_cutoff
+        self._ctime_cutoff = ctime_cutoff
+        self._pending: List[tuple] = []
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime INTEGER, "
+                           "children INTEGER, subdirs INTEGER, size INTEGER, names TEXT, generation INTEGER)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+        if meta.get("fingerprint") != fingerprint:
+            self._conn.execute("DELETE FROM dirs")
+        self.generation = int(meta.get("generation") or 0) + 1
+        self._conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                               [("fingerprint", fingerprint), ("generation", str(self.generation))])
+        self._conn.commit()
+
+    def get(self, path: str) -> Optional[Tuple[int, int, int, int, List[str]]]:
+        """
+        返回 (mtime, 子项数, 子目录数, 直接文件大小, 子目录名列表)，没有记录时返回 None
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT mtime, children, subdirs, size, names FROM dirs WHERE path = ?",
+                                     (path,)).fetchone()
+        if row is None:
+            return None
+        mtime, children, subdirs, size, names = row
+        return mtime, children, subdirs, size, names.split("\0") if names else []
+
+    def put(self, path: str, mtime: int, children: int, subdirs: int, size: int, names: List[str],
+            newest: Tuple[float, float] = (0, 0)):
+        """
+        newest 为目录内直接文件最新的 (mtime, ctime)
+        """
+        if (self._mtime_cutoff is not None and newest[0] >= self._mtime_cutoff) \
+                or (self._ctime_cutoff is not None and newest[1] >= self._ctime_cutoff):
+            mtime = -1
+        self._write(("INSERT OR REPLACE INTO dirs (path, mtime, children, subdirs, size, names, generation) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     (path, mtime, children, subdirs, size, "\0".join(names), self.generation)))
+
+    def discard(self, path: str):
+        self._write(("DELETE FROM dirs WHERE path = ?", (path,)))
+
+    def _write(self, statement: tuple):
+        with self._lock:
+            self._pending.append(statement)
+            if len(self._pending) >= self._FLUSH_SIZE:
+                self._flush()
+
+    def _flush(self):
+        for sql, params in self._pending:
+            self._conn.execute(sql, params)
+        self._conn.commit()
+        self._pending.clear()
+
+    def close(self, complete: bool = False):
+        """
+        提交剩余写入；complete 为 True 表示本次完整遍历了所有监控目录，清理本次未访问到的过期记录
+        """
+        with self._lock:
+            self._flush()
+            if complete:
+                self._conn.execute("DELETE FROM dirs WHERE generation != ?", (self.generation,))
+                self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,75 @@
+import os
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+
+class KeywordMatcher:
+    """
+    排除关键词的 Aho-Corasick 多模式匹配自动机
+    在 init_plugin 中构建一次，判断一条路径是否包含任一关键词只需线性扫描一遍路径，
+    与关键词数量无关；匹配状态可以从父目录继续，子项只需再扫描自身名称
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[bool] = [False]
+        for keyword in keywords:
+            if keyword:
+                self._add(keyword)
+        self._build()
+
+    def __bool__(self) -> bool:
+        return len(self._goto) > 1
+
+    def _add(self, keyword: str):
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(False)
+                self._goto[state][ch] = nxt
+            state = nxt
+        self._out[state] = True
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] or self._out[self._fail[nxt]]
+
+    def feed(self, text: str, state: int = 0) -> Tuple[int, bool]:
+        """
+        从 state 开始继续匹配 text，返回 (结束状态, 是否命中关键词)
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        for ch in text:
+            while True:
+                nxt = goto[state].get(ch)
+                if nxt is not None:
+                    state = nxt
+                    break
+                if not state:
+                    break
+                state = fail[state]
+            if out[state]:
+                return state, True
+        return state, False
+
+    def child(self, state: int, name: str) -> Tuple[int, bool]:
+        """
+        由父目录的匹配状态继续匹配子项路径
+        """
+        return self.feed(os.sep + name, state)
+
+    def search(self, text: str) -> bool:
+        return self.feed(text)[1]
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+
+class TokenBucket:
+    """
+    令牌桶限速：rate 为每秒补充的令牌数，burst 为桶容量（允许的瞬时突发数）
+    rate 不大于 0 时不限速
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class MountLimiter:
+    """
+    按挂载点分配令牌桶和并发上限，同一挂载点下的多个监控目录共享同一份配额
+    """
+
+    def __init__(self, rate: float, burst: int, max_inflight: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_inflight = max(1, max_inflight)
+        self._limits: Dict[str, Tuple[TokenBucket, asyncio.Semaphore]] = {}
+
+    def get(self, path: str) -> Tuple[TokenBucket, asyncio.Semaphore]:
+        mount = find_mount(path)
+        limit = self._limits.get(mount)
+        if limit is None:
+            limit = (TokenBucket(self.rate, self.burst), asyncio.Semaphore(self.max_inflight))
+            self._limits[mount] = limit
+        return limit
+
+
+def find_mount(path: str) -> str:
+    """
+    向上查找路径所在的挂载点
+    """
+    path = os.path.abspath(path)
+    while not os.path.ismount(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def parse_legacy_delay(delay: str) -> Optional[Tuple[float, int]]:
+    """
+    兼容旧的随机延时配置，例如 '20,1-10' 表示每处理 20 个文件平均等待 1-10 秒的中值，
+    换算为 (每秒操作数, 突发数)，无法解析时返回 None
+    """
+    try:
+        count, seconds = delay.split(',')
+        min_sec, max_sec = map(float, seconds.split('-'))
+        count = int(count)
+    except (AttributeError, ValueError):
+        return None
+    average = (min_sec + max_sec) / 2
+    if count <= 0 or average <= 0:
+        return None
+    return count / average, count
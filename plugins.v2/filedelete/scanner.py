@@ -0,0 +1,230 @@
+import os
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .index import ScanIndex
+from .inodes import tree_size
+from .matcher import KeywordMatcher
+from .metrics import RunMetrics
+
+
+class DirNode:
+    """
+    后序遍历中的目录节点
+    size 为整棵子树内仍存在文件的累计大小，direct_size 为其中直接文件的大小，
+    children 为仍存在的直接子项数量，subdirs 为其中非普通文件（子目录等）的数量；
+    子目录产出并处理完成后，其结果才会并入父目录，因此父目录产出时即可 O(1) 判断
+    state 为排除关键词自动机匹配到该目录路径末尾的状态，excluded 表示目录路径已命中排除关键词
+    record 仅在启用增量索引时使用：[列目录时的 mtime, 列目录时的子项数, 保留的子目录名, 直接文件最新的 mtime, 最新的 ctime]
+    """
+    __slots__ = ("path", "parent", "children", "subdirs", "size", "direct_size", "removed",
+                 "state", "excluded", "record")
+
+    def __init__(self, path: str, parent: Optional["DirNode"] = None, state: int = 0, excluded: bool = False):
+        self.path = path
+        self.parent = parent
+        self.children = 0
+        self.subdirs = 0
+        self.size = 0
+        self.direct_size = 0
+        self.removed = False
+        self.state = state
+        self.excluded = excluded
+        self.record: Optional[list] = None
+
+    def discard(self, size: int = 0):
+        """
+        登记一个已删除的直接子文件
+        """
+        self.children -= 1
+        self.size -= size
+        self.direct_size -= size
+
+
+def scan_tree(root: str,
+              onerror: Optional[Callable[[OSError], None]] = None,
+              stat_files: bool = False,
+              matcher: Optional[KeywordMatcher] = None,
+              parent: Optional[DirNode] = None,
+              spawn: Optional[Callable[[DirNode], bool]] = None,
+              index: Optional[ScanIndex] = None,
+              done: Optional[Dict[str, int]] = None,
+              metrics: Optional[RunMetrics] = None,
+              unique_sizes: bool = False) -> Iterator[Tuple[DirNode, Optional[os.DirEntry]]]:
+    """
+    基于 os.scandir 的单次遍历，以流的方式产出 (目录节点, 文件项)
+    文件在列目录的同时逐个产出，不在内存中保留文件列表；目录处理完后以 (目录节点, None) 后序产出，
+    子目录总是先于其父目录产出。DirEntry 自带文件类型和缓存的 stat 结果，不再重复 stat；
+    stat_files 为 True 时累计文件大小，并在子目录处理完后逐级向上汇总；
+    传入 matcher 时，每个目录的匹配状态由父目录状态加上自身名称得到；命中排除关键词的目录直接剪枝，
+    不再列出和 stat 其中的内容，只以完成事件产出一次，并在父目录中保持计数，父目录不会被删除
+    调用方删除文件时调用 node.discard，删除目录时置 node.removed
+    parent 不为空时 root 是 parent 下的一个子目录（例如分发到其他线程的子树），匹配状态从 parent 继续，
+    且 root 自身也参与删除判断；spawn 对 root 的每个子目录调用一次，返回 True 表示该子树已交由调用方处理，
+    这里不再深入
+    传入 index 时每个目录只 stat 一次，mtime 与索引记录一致则直接复用记录中的计数和子目录名，
+    不列目录、不产出其中的文件；监控目录本身总是重新列出
+    done 为上次中断前已处理完成的目录 {路径: 子树大小}，这些目录不再进入，按记录的大小计入父目录
+    传入 metrics 时每个目录汇总一次列目录、stat 的次数和耗时，产出文件后调用方处理的时间不计入
+    unique_sizes 为 True 时目录大小按 inode 去重累计（见 inodes.tree_size），调用方 discard 时须按同样方式计算
+    """
+    if parent is None:
+        root_node = DirNode(root)
+        if matcher:
+            root_node.state, root_node.excluded = matcher.feed(root.rstrip(os.sep))
+    else:
+        root_node = DirNode(root, parent, parent.state, parent.excluded)
+        if matcher and not parent.excluded:
+            root_node.state, root_node.excluded = matcher.child(parent.state, os.path.basename(root))
+    stack: List[Tuple[DirNode, bool]] = [(root_node, False)]
+
+    def push_child(node: DirNode, path: str, name: str):
+        if done and path in done:
+            node.size += done[path]
+            if node.record is not None and node.record[2] is not None:
+                node.record[2].append(name)
+            return
+        child = DirNode(path, node, node.state, node.excluded)
+        if matcher and not node.excluded:
+            child.state, child.excluded = matcher.child(node.state, name)
+        if spawn and node is root_node and not child.excluded and spawn(child):
+            return
+        stack.append((child, False))
+
+    while stack:
+        node, listed = stack.pop()
+        if listed:
+            yield node, None
+            parent = node.parent
+            if parent is not None:
+                if node.removed:
+                    parent.children -= 1
+                    parent.subdirs -= 1
+                else:
+                    parent.size += node.size
+                    if parent.record is not None and parent.record[2] is not None:
+                        parent.record[2].append(os.path.basename(node.path))
+            if node.record is not None:
+                _save_record(index, node, onerror)
+            continue
+        if node.excluded:
+            stack.append((node, True))
+            continue
+        stat_calls, stat_time = 0, 0.0
+        if index is not None and node.parent is not None:
+            started = time.perf_counter()
+            try:
+                mtime = os.stat(node.path).st_mtime_ns
+            except OSError as e:
+                _invalidate_parent(node)
+                if onerror:
+                    onerror(e)
+                continue
+            stat_calls, stat_time = 1, time.perf_counter() - started
+            node.record = [mtime, 0, [], 0.0, 0.0]
+            cached = index.get(node.path)
+            if cached is not None and cached[0] == mtime:
+                _, node.children, node.subdirs, node.direct_size, names = cached
+                node.size = node.direct_size
+                node.record[1] = node.children
+                if metrics is not None:
+                    metrics.dir_listed(node.path, 0.0, 0, stat_calls, stat_time)
+                stack.append((node, True))
+                for name in reversed(names):
+                    push_child(node, os.path.join(node.path, name), name)
+                continue
+        subdirs: List[os.DirEntry] = []
+        listed_count = 0
+        files = 0
+        list_time = 0.0
+        try:
+            started = time.perf_counter()
+            with os.scandir(node.path) as it:
+                for entry in it:
+                    node.children += 1
+                    listed_count += 1
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            node.subdirs += 1
+                            subdirs.append(entry)
+                            continue
+                        is_file = entry.is_file()
+                    except OSError:
+                        is_file = False
+                    if not is_file:
+                        node.subdirs += 1
+                        continue
+                    files += 1
+                    if stat_files:
+                        stat_started = time.perf_counter()
+                        try:
+                            stat = entry.stat()
+                            size = tree_size(stat, unique_sizes)
+                            if node.record is not None:
+                                node.record[3] = max(node.record[3], stat.st_mtime)
+                                node.record[4] = max(node.record[4], stat.st_ctime)
+                        except OSError:
+                            size = 0
+                        elapsed = time.perf_counter() - stat_started
+                        stat_calls += 1
+                        stat_time += elapsed
+                        list_time -= elapsed
+                        node.direct_size += size
+                        node.size += size
+                    list_time += time.perf_counter() - started
+                    yield node, entry
+                    started = time.perf_counter()
+            list_time += time.perf_counter() - started
+        except OSError as e:
+            # 无法读取的目录不产出，父目录计数保持不变，不会被视为空目录
+            _invalidate_parent(node)
+            if onerror:
+                onerror(e)
+            continue
+        if node.record is not None:
+            # 文件在列目录过程中可能已被删除，这里记录列出的子项数用于判断目录是否有变化
+            node.record[1] = listed_count
+        if metrics is not None:
+            metrics.dir_listed(node.path, list_time, files, stat_calls, stat_time)
+        stack.append((node, True))
+        for entry in reversed(subdirs):
+            push_child(node, entry.path, entry.name)
+
+
+def _invalidate_parent(node: DirNode):
+    """
+    子目录读取失败时父目录的子目录名不完整，不写入索引
+    """
+    if node.parent is not None and node.parent.record is not None:
+        node.parent.record[2] = None
+
+
+def _save_record(index: ScanIndex, node: DirNode, onerror: Optional[Callable[[OSError], None]]):
+    """
+    目录处理完成后写入索引；目录内有删除时 mtime 已变化，需要重新获取
+    """
+    if node.removed:
+        index.discard(node.path)
+        return
+    mtime, children, names, newest_mtime, newest_ctime = node.record
+    if names is None:
+        return
+    if node.children != children:
+        try:
+            mtime = os.stat(node.path).st_mtime_ns
+        except OSError as e:
+            if onerror:
+                onerror(e)
+            return
+    index.put(node.path, mtime, node.children, node.subdirs, node.direct_size, names,
+              (newest_mtime, newest_ctime))
+
+
+def entry_size(entry: os.DirEntry, unique: bool = False) -> int:
+    """
+    读取 DirEntry 缓存的文件大小，文件已消失时按 0 计；unique 含义同 inodes.tree_size
+    """
+    try:
+        return tree_size(entry.stat(), unique)
+    except OSError:
+        return 0
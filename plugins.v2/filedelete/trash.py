@@ -0,0 +1,135 @@
+import os
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+# 回收站目录名，位于各监控目录下，扫描时按排除关键词剪枝
+TRASH_DIRNAME = ".filedelete_trash"
+# 运行批次目录名的时间格式
+_RUN_FORMAT = "%Y%m%d-%H%M%S"
+
+
+class Trash:
+    """
+    回收站：删除改为把文件 rename 到同一监控目录下的 .filedelete_trash/<运行批次>/<相对路径>，
+    同一文件系统内只修改元数据，云盘挂载上也只是一次调用；目录删除时在回收站中保留同名目录，恢复时原样重建
+    跨文件系统（监控目录下另有挂载点）时 rename 失败，文件保留不删除
+    """
+
+    def __init__(self, roots: List[str], run_id: Optional[str] = None):
+        self.run_id = run_id or time.strftime(_RUN_FORMAT)
+        # 嵌套的监控目录优先匹配更深的一个
+        self._roots = sorted((root.rstrip(os.sep) for root in roots), key=len, reverse=True)
+        self._made: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def target(self, path: str) -> str:
+        for root in self._roots:
+            if path.startswith(root + os.sep):
+                return os.path.join(root, TRASH_DIRNAME, self.run_id, path[len(root) + 1:])
+        raise OSError(f"{path} 不在监控目录中，无法移入回收站")
+
+    def _makedirs(self, directory: str):
+        with self._lock:
+            if directory in self._made:
+                return
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self._made.add(directory)
+
+    def move(self, path: str, name: Optional[str] = None, dir_fd: Optional[int] = None):
+        """
+        把文件移入回收站；name、dir_fd 为父目录 fd 和文件名，未传入时使用完整路径
+        """
+        target = self.target(path)
+        self._makedirs(os.path.dirname(target))
+        os.rename(name or path, target, src_dir_fd=dir_fd)
+
+    def keep_dir(self, path: str):
+        """
+        目录删除前调用，在回收站中保留对应目录
+        """
+        self._makedirs(self.target(path))
+
+
+def _runs(root: str) -> List[str]:
+    try:
+        with os.scandir(os.path.join(root, TRASH_DIRNAME)) as it:
+            return [entry.name for entry in it if entry.is_dir(follow_symlinks=False)]
+    except FileNotFoundError:
+        return []
+
+
+def list_runs(roots: List[str]) -> List[Dict[str, object]]:
+    """
+    列出各监控目录回收站中的运行批次，新的在前
+    """
+    runs: Dict[str, List[str]] = {}
+    for root in roots:
+        for run_id in _runs(root):
+            runs.setdefault(run_id, []).append(root)
+    return [{"run": run_id, "roots": runs[run_id]} for run_id in sorted(runs, reverse=True)]
+
+
+def purge(roots: List[str], retention_days: float, onerror=None) -> int:
+    """
+    整批清除超过保留天数的运行批次，返回清除的批次数
+    """
+    cutoff = time.time() - retention_days * 86400
+    purged = 0
+    for root in roots:
+        for run_id in _runs(root):
+            try:
+                created = time.mktime(time.strptime(run_id, _RUN_FORMAT))
+            except ValueError:
+                continue
+            if created >= cutoff:
+                continue
+            shutil.rmtree(os.path.join(root, TRASH_DIRNAME, run_id), onerror=onerror)
+            purged += 1
+    return purged
+
+
+def restore(roots: List[str], run_id: str, onerror=None) -> Tuple[int, int]:
+    """
+    把一个运行批次中的文件和目录移回原位置，原位置已有同名文件的保留在回收站中，全部恢复后删除批次目录；
+    返回 (恢复的文件数, 跳过的文件数)
+    """
+    restored = skipped = 0
+    for root in roots:
+        run_dir = os.path.join(root, TRASH_DIRNAME, run_id)
+        if not os.path.isdir(run_dir):
+            continue
+        for dirpath, _, filenames in os.walk(run_dir, topdown=False):
+            original_dir = os.path.join(root, os.path.relpath(dirpath, run_dir))
+            try:
+                os.makedirs(original_dir, exist_ok=True)
+            except OSError as e:
+                if onerror:
+                    onerror(e)
+                skipped += len(filenames)
+                continue
+            for filename in filenames:
+                original = os.path.join(original_dir, filename)
+                if os.path.lexists(original):
+                    skipped += 1
+                    continue
+                try:
+                    os.rename(os.path.join(dirpath, filename), original)
+                    restored += 1
+                except OSError as e:
+                    if onerror:
+                        onerror(e)
+                    skipped += 1
+            # 目录中的内容全部恢复后删除，run_dir 最后处理，整批恢复后批次目录随之删除
+            try:
+                os.rmdir(dirpath)
+            except OSError:
+                pass
+        # 回收站中已没有其他批次时删除回收站目录
+        try:
+            os.rmdir(os.path.join(root, TRASH_DIRNAME))
+        except OSError:
+            pass
+    return restored, skipped
@@ -1,7 +1,13 @@
 import datetime
+import hashlib
+import json
 import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Iterator, Optional, Callable, Set
 import pytz
 from apscheduler.schedulers.background import BackgroundScheduler
 from app.core.config import settings
@@ -9,6 +15,19 @@ from app.log import logger
 from app.plugins import _PluginBase
 import os
 
+from .checkpoint import Checkpoint
+from .dirfd import DirFds
+from .index import ScanIndex
+from .inodes import InodeLedger, tree_size
+from .matcher import KeywordMatcher
+from .metrics import RunMetrics, describe_bytes, render_page
+from .rules import Rule, RuleSet, parse_rules
+from .planner import (OP_RMDIR, OP_UNLINK, RULE_EMPTY_DIR, RULE_FILE, RULE_SMALL_DIR, PlanOp, PlanWriter,
+                      read_plan, read_summary)
+from .scanner import DirNode, scan_tree, entry_size
+from .trash import TRASH_DIRNAME, Trash, list_runs, purge, restore
+from .watcher import DebouncedWatcher, supports_events
+
 class FileDelete(_PluginBase):
     # 插件名称
     plugin_name = "云盘无用文件删除"
@@ -17,7 +36,7 @@ class FileDelete(_PluginBase):
     # 插件图标
     plugin_icon = "https://raw.githubusercontent.com/guyue2005/MoviePilot-Plugins/main/icons/delete.png"
     # 插件版本
-    plugin_version = "1.5"
+    plugin_version = "1.28"
     # 插件作者
     plugin_author = "guyue2005"
     # 作者主页
@@ -33,9 +52,13 @@ class FileDelete(_PluginBase):
     _enabled = False
     _onlyonce = False
     _monitor_dirs = ""
-    _format = None
+    _rules_text = ""
     _keywords = None
     _delete_files_enabled = True  # 默认为启用文件删除
+    # 逐个文件的日志只在 debug 级别输出，info 级别每删除这么多个文件输出一次进度
+    _LOG_EVERY = 1000
+    # 实时模式的最小文件年龄（秒），不论是否配置最小保留天数，修改时间在此之内的文件都不删除
+    _REALTIME_MIN_AGE = 600
     
     
     def __init__(self):
@@ -43,6 +66,28 @@ class FileDelete(_PluginBase):
         self._delete_empty_dirs = False
         self._delete_small_dirs = False
         self._small_dir_size_threshold = 10
+        # 文件最小保留天数，未到时不删除，避免删除仍在下载的文件
+        self._min_file_age = 0
+        # 目录大小按 inode 去重计算，硬链接不重复计入
+        self._unique_sizes = False
+        self._matcher = KeywordMatcher([TRASH_DIRNAME])
+        self._file_rules = RuleSet([])
+        self._scan_workers = 4
+        self._incremental = False
+        self._realtime = False
+        self._debounce = 10
+        self._poll_interval = 60
+        self._watcher: Optional[DebouncedWatcher] = None
+        # delete: 直接删除；plan: 只生成删除计划；apply: 执行已生成的删除计划
+        self._run_mode = "delete"
+        # stop_service 时通知正在进行的删除任务中止
+        self._stop_event = threading.Event()
+        # 正在进行或最近一次运行的统计
+        self._metrics: Optional[RunMetrics] = None
+        # 删除改为移入回收站，超过保留天数后定时清除
+        self._trash = False
+        self._trash_retention = 7
+        self._trash_purge_cron = "0 5 * * *"
     
 
     
@@ -54,17 +99,34 @@ class FileDelete(_PluginBase):
             self._onlyonce = config.get("onlyonce", False)
             self._monitor_dirs = config.get("monitor_dirs", "")
             self._keywords = config.get("keywords", "")
+            self._rules_text = config.get("rules", "")
             self._delete_empty_dirs = config.get("delete_empty_dirs", False)
             self._delete_small_dirs = config.get("delete_small_dirs", False)
             self._small_dir_size_threshold = int(config.get("small_dir_size_threshold", 10))
+            self._min_file_age = max(0.0, float(config.get("min_file_age") or 0))
+            self._unique_sizes = config.get("unique_sizes", False)
+            self._scan_workers = max(1, int(config.get("scan_workers") or 4))
+            self._incremental = config.get("incremental", False)
+            self._realtime = config.get("realtime", False)
+            self._debounce = max(1, int(config.get("debounce") or 10))
+            self._poll_interval = max(1, int(config.get("poll_interval") or 60))
+            self._run_mode = config.get("run_mode") or "delete"
+            self._trash = config.get("trash", False)
+            self._trash_retention = max(0.0, float(config.get("trash_retention") or 7))
+            self._trash_purge_cron = config.get("trash_purge_cron") or "0 5 * * *"
             self._delete_files_enabled = config.get("delete_files_enabled", False)  # 默认关闭
             self._cron = config.get('cron', '30 4 * * *')  # 添加 cron 设置
+            # 排除关键词只在初始化时编译一次，回收站目录始终排除
+            self._matcher = KeywordMatcher([kw.strip() for kw in (self._keywords or "").split(",") if kw.strip()]
+                                           + [TRASH_DIRNAME])
+            self._file_rules = self._compile_rules()
 
             logger.info(f"插件初始化状态: 启用={self._enabled}, 仅运行一次={self._onlyonce}, "
                         f"删除文件={self._delete_files_enabled}, 删除空目录={self._delete_empty_dirs}, "
                         f"删除全部目录={self._delete_small_dirs} ")
 
         self.stop_service()
+        self._stop_event.clear()
 
         if self._enabled or self._onlyonce:
             self._scheduler = BackgroundScheduler(timezone=settings.TZ)
@@ -79,9 +141,7 @@ class FileDelete(_PluginBase):
 
             if self._onlyonce:
                 logger.info("文件删除服务启动，立即运行一次")
-                self.delete_files_if_enabled()
-                self.delete_empty_dirs_if_enabled()
-                self.delete_small_dirs_if_enabled()
+                self.run_enabled_deletion_methods()
                 self._onlyonce = False
                 self.__update_config()
 
@@ -95,12 +155,40 @@ class FileDelete(_PluginBase):
                 )
                 logger.info(f"已添加定时任务，cron 表达式: {self._cron}")
 
+            if self._enabled and self._trash and self._trash_purge_cron:
+                self._scheduler.add_job(
+                    self.purge_trash,
+                    trigger='cron',
+                    id='file_delete_trash_purge',
+                    **self._cron_kwargs(self._trash_purge_cron)
+                )
+                logger.info(f"已添加回收站清理任务，cron 表达式: {self._trash_purge_cron}，"
+                            f"保留 {self._trash_retention} 天")
+
+            # 实时模式会直接删除，只在直接删除模式下启用
+            if self._enabled and self._realtime and self._run_mode == "delete":
+                self._start_realtime(monitor_dirs)
+
             if self._scheduler.get_jobs():
                 self._scheduler.print_jobs()
                 self._scheduler.start()
 
-    def _cron_kwargs(self):
-        cron_parts = self._cron.split()
+    def _compile_rules(self) -> RuleSet:
+        """
+        编译文件删除规则；未配置规则时沿用按大小阈值删除的单条规则
+        最小保留天数对所有规则生效，规则自身的年龄条件更短时按最小保留天数计
+        """
+        rules, errors = parse_rules(self._rules_text)
+        for error in errors:
+            logger.error(error)
+        if rules:
+            logger.info(f"已加载 {len(rules.rules)} 条文件删除规则")
+            return rules.with_min_age(self._min_file_age * 86400)
+        return RuleSet([Rule(RULE_FILE, max_size=int(self._small_dir_size_threshold) * 1024 * 1024,
+                             min_age=self._min_file_age * 86400)])
+
+    def _cron_kwargs(self, cron: Optional[str] = None):
+        cron_parts = (cron or self._cron).split()
         return {
             'minute': cron_parts[0],
             'hour': cron_parts[1],
@@ -109,151 +197,612 @@ class FileDelete(_PluginBase):
             'day_of_week': cron_parts[4]
         }
 
-    def run_enabled_deletion_methods(self):
-        self.delete_files_if_enabled()
-        self.delete_empty_dirs_if_enabled()
-        self.delete_small_dirs_if_enabled()
+    def _start_realtime(self, monitor_dirs: List[str]):
+        """
+        实时模式：能产生文件事件的目录由 watchdog 监控，只处理发生变化的路径；
+        rclone、NFS 等网络挂载收不到远端变化的事件，改为按间隔定时全量扫描
+        """
+        event_dirs = [path for path in monitor_dirs if supports_events(path)]
+        polled_dirs = [path for path in monitor_dirs if path not in event_dirs]
+        if event_dirs:
+            try:
+                # 路径在最小文件年龄内没有新事件才处理，届时其中的文件都已满足年龄下限
+                self._watcher = DebouncedWatcher(event_dirs, self._handle_changes,
+                                                 max(self._debounce, self._REALTIME_MIN_AGE))
+                self._watcher.start()
+                logger.info(f"已启动实时监控: {event_dirs}")
+            except Exception as e:
+                logger.error(f"启动实时监控失败，改为定时扫描：{e}")
+                self._watcher = None
+                polled_dirs = monitor_dirs
+        if polled_dirs:
+            self._scheduler.add_job(
+                self.run_enabled_deletion_methods,
+                trigger='interval',
+                id='file_delete_poll',
+                minutes=self._poll_interval,
+                kwargs={'paths': polled_dirs}
+            )
+            logger.info(f"以下目录不支持文件事件，每 {self._poll_interval} 分钟全量扫描一次: {polled_dirs}")
 
-    def delete_files_if_enabled(self):
-        if self._delete_files_enabled:
-            self.delete_files()
-        else:
-            logger.info("文件删除未启用，跳过操作")
+    def _handle_changes(self, paths: Set[str]):
+        """
+        实时模式下只对写入完成或移入的路径应用关键词和删除规则，只删除文件，不删除目录；
+        移入的目录（例如下载完成后移动过来的种子目录）整体扫描其中的文件；
+        规则的年龄条件不低于 _REALTIME_MIN_AGE（10 分钟），下载停滞不超过这个时长时，断续写入的文件不会被当作小文件删除；
+        停滞更久的文件仍按规则处理
+        """
+        if not self._delete_files_enabled:
+            return
+        counts = Counter()
+        trash = self._new_trash(list(self._dirconf))
+        rules = self._file_rules.with_min_age(self._REALTIME_MIN_AGE)
+        # 排序后父目录排在其子项之前，目录扫描过的文件后面会直接跳过
+        for path in sorted(paths):
+            if os.path.isdir(path) and not os.path.islink(path):
+                parent_path = os.path.dirname(path)
+                state, excluded = self._matcher.feed(parent_path.rstrip(os.sep))
+                if not excluded:
+                    counts.update(self._scan_unit(path, DirNode(parent_path, state=state), files=True,
+                                                  trash=trash, rules=rules))
+                continue
+            if not os.path.isfile(path) or self._matcher.search(path):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if rules.match(os.path.basename(path), stat, time.time()) is None:
+                continue
+            try:
+                if trash:
+                    trash.move(path)
+                else:
+                    os.remove(path)
+                counts['files'] += 1
+                logger.debug(f"成功删除文件: {path}")
+            except Exception as e:
+                logger.error(f"删除文件 {path} 失败：{e}")
+        if counts['files']:
+            logger.info(f"实时删除完成，共删除了 {counts['files']} 个文件。")
 
-    def delete_empty_dirs_if_enabled(self):
-        if self._delete_empty_dirs:
-            self.delete_empty_dirs()
-        else:
+    def run_enabled_deletion_methods(self, paths: Optional[List[str]] = None):
+        if self._run_mode == "apply":
+            self.apply_plan()
+            return
+        if not self._delete_files_enabled:
+            logger.info("文件删除未启用，跳过操作")
+        if not self._delete_empty_dirs:
             logger.info("删除空目录未启用，跳过操作")
-
-    def delete_small_dirs_if_enabled(self):
-        if self._delete_small_dirs:
-            self.delete_small_dirs()
-        else:
+        if not self._delete_small_dirs:
             logger.info("删除全部目录未启用，跳过操作")
-     
-    def list_files(self, directory: Path) -> List[Path]:
-        return [file for file in directory.rglob('*') if file.is_file()] 
+        self._run_deletion(files=self._delete_files_enabled,
+                           empty_dirs=self._delete_empty_dirs,
+                           small_dirs=self._delete_small_dirs,
+                           paths=paths,
+                           plan=self._run_mode == "plan")
 
     def delete_files(self):
-        logger.info("开始全量删除文件 ...")
-        exclude_keywords = [kw.strip() for kw in self._keywords.split(",") if kw.strip()]
-        deleted_files_count = 0  # 计数已删除文件
-        size_threshold = int(self._small_dir_size_threshold) * 1024 * 1024  # 转换为字节
-
-        for mon_path in self._dirconf.keys():
-            logger.info(f"当前监控路径: {mon_path}")
+        self._run_deletion(files=True)
 
-            if not Path(mon_path).exists():
-                logger.error(f"监控路径不存在: {mon_path}")
-                continue
+    def delete_empty_dirs(self):
+        self._run_deletion(empty_dirs=True)
 
-            try:
-                logger.info(f"准备在路径 {mon_path} 中查找文件 ...")
-                files = self.list_files(Path(mon_path))
-            except Exception as e:
-                logger.error(f"调用 list_files 方法时发生异常: {e}", exc_info=True)
-                continue
+    def delete_small_dirs(self):
+        self._run_deletion(small_dirs=True)
 
-            if not files:
-                logger.info("未找到任何文件，跳过删除操作")
-                continue
+    def _run_deletion(self, files: bool = False, empty_dirs: bool = False, small_dirs: bool = False,
+                      paths: Optional[List[str]] = None, plan: bool = False):
+        """
+        每个监控目录只遍历一次，扫描、过滤、删除组成惰性的生成器流水线：
+        扫描到的文件立即经过过滤并删除，内存占用与目录树规模无关。
+        各监控目录及其一级子目录作为独立任务提交到线程池并发处理，慢速挂载不再拖住其他目录；
+        paths 为空时处理全部监控目录。
+        plan 为 True 时不删除任何内容，只按相同的规则模拟删除并把操作流式写入删除计划文件。
+        删除进度定期写入断点记录，任务中断后下次运行从中断处继续
+        """
+        if not (files or empty_dirs or small_dirs):
+            return
+        if plan:
+            logger.info("开始生成删除计划 ...")
+        if files:
+            logger.info("开始全量删除文件 ...")
+        if empty_dirs:
+            logger.info("开始删除空目录 ...")
+        if small_dirs:
+            logger.info("开始删除小于设定容量的目录 ...")
 
-            for file in files:
-                if file.is_file():
-                    # 在删除文件之前检查排除关键词
-                    if any(exclude_kw in str(file) for exclude_kw in exclude_keywords):
-                        logger.info(f"文件 {file} 包含排除关键词，跳过删除。")
-                        continue
-                    
-                    # 检查文件大小
-                    file_size = file.stat().st_size  # 获取文件大小
-                    if file_size > size_threshold:
-                        logger.info(f"文件 {file} 大小超过阈值，跳过删除。")
+        run_paths = list(paths or self._dirconf.keys())
+        # 生成计划时没有实际删除，目录状态不能写入增量索引，也不需要断点
+        index = self._open_index(files, empty_dirs, small_dirs) if self._incremental and not plan else None
+        writer = PlanWriter(self._plan_path(), self._rules_fingerprint(files, empty_dirs, small_dirs)) \
+            if plan else None
+        checkpoint = None if plan else self._open_checkpoint(files, empty_dirs, small_dirs, run_paths,
+                                                             partial_run=paths is not None)
+        trash = None if plan else self._new_trash(run_paths)
+        metrics = self._metrics = RunMetrics(trash=trash is not None)
+        scan_unit = partial(self._scan_unit, files=files, empty_dirs=empty_dirs, small_dirs=small_dirs,
+                            size_threshold=int(self._small_dir_size_threshold) * 1024 * 1024, index=index,
+                            plan=writer, checkpoint=checkpoint, metrics=metrics, trash=trash,
+                            inodes=InodeLedger())
+        counts = Counter()
+        complete = False
+        try:
+            with ThreadPoolExecutor(max_workers=self._scan_workers, thread_name_prefix="FileDelete") as pool:
+                monitor_futures = []
+                for mon_path in run_paths:
+                    if not Path(mon_path).exists():
+                        logger.error(f"监控路径不存在: {mon_path}")
                         continue
+                    monitor_futures.append((mon_path, pool.submit(self._scan_monitor_dir, pool, scan_unit, mon_path)))
+                for mon_path, future in monitor_futures:
+                    root_counts, subtree_futures = future.result()
+                    # 各单元的计数可能登记在断点记录中，这里汇总到新的计数器
+                    monitor_counts = Counter(root_counts)
+                    for subtree_future in subtree_futures:
+                        monitor_counts.update(subtree_future.result())
+                    counts.update(monitor_counts)
+                    if writer:
+                        writer.total(mon_path, monitor_counts)
+            complete = not self._stop_event.is_set()
+        finally:
+            if index:
+                index.close(complete=complete and paths is None)
+            if writer:
+                writer.close(complete)
+            if checkpoint:
+                if complete:
+                    checkpoint.finish()
+                else:
+                    checkpoint.save()
+            if not plan:
+                metrics.freed(counts['bytes'])
+            self._finish_metrics(metrics)
+            if trash:
+                logger.info(f"本次删除的内容已移入回收站，批次 {trash.run_id}，保留 {self._trash_retention} 天")
 
-                    logger.info(f"找到小文件：{file}，大小：{file_size / 1024 / 1024:.2f} MB")
-                    try:
-                        os.remove(file)
-                        logger.info(f"成功删除文件: {file}")
-                        deleted_files_count += 1
-                    except Exception as e:
-                        logger.error(f"删除文件 {file} 失败：{e}")
+        if not complete:
+            logger.info("插件已停止，删除任务中止" + ("" if plan else "，进度已保存，下次运行时继续"))
+            return
+        if checkpoint:
+            counts.update(checkpoint.carried)
 
-        logger.info(f"文件删除操作完成，共删除了 {deleted_files_count} 个小于 {self._small_dir_size_threshold} MB 的文件。")
+        if writer:
+            logger.info(f"删除计划已生成：{writer.path}，共 {counts['files']} 个文件、{counts['empty_dirs']} 个空目录、"
+                        f"{counts['small_dirs']} 个小目录，预计释放 {counts['bytes'] / 1024 / 1024:.2f} MB")
+            return
+        if files and self._rules_text:
+            logger.info(f"文件删除操作完成，共删除了 {counts['files']} 个符合规则的文件。")
+        elif files:
+            logger.info(f"文件删除操作完成，共删除了 {counts['files']} 个小于 {self._small_dir_size_threshold} MB 的文件。")
+        if empty_dirs:
+            logger.info(f"删除空目录操作完成，共删除了 {counts['empty_dirs']} 个目录。")
+        if small_dirs:
+            if counts['small_dirs']:
+                logger.info(f"全部目录删除操作完成，共删除了 {counts['small_dirs']} 个小于 {self._small_dir_size_threshold} MB 的目录。")
+            else:
+                logger.info(f"未找到小于 {self._small_dir_size_threshold} MB的目录，跳过操作。")
 
+    def apply_plan(self):
+        """
+        分批执行已生成的删除计划，不再遍历目录；执行完成后计划文件改名保留，不会重复执行
+        """
+        plan_path = self._plan_path()
+        summary = read_summary(plan_path)
+        if summary is None:
+            logger.info("没有可执行的删除计划，跳过操作")
+            return
+        created = datetime.datetime.fromtimestamp(summary.get("created", 0)).strftime("%Y-%m-%d %H:%M:%S")
+        logger.info(f"开始执行删除计划：{plan_path}，生成于 {created}")
+        counts = Counter()
+        done = 0
+        trash = self._new_trash(list(self._dirconf))
+        metrics = self._metrics = RunMetrics(trash=trash is not None)
+        try:
+            with ThreadPoolExecutor(max_workers=self._scan_workers, thread_name_prefix="FileDelete") as pool:
+                for batch in read_plan(plan_path):
+                    # 中止后计划文件保留，再次执行时已删除的内容会被跳过
+                    if self._stop_event.is_set():
+                        logger.info("插件已停止，删除计划执行中止")
+                        return
+                    counts.update(self._apply_batch(pool, batch, metrics, trash))
+                    done += len(batch)
+                    logger.info(f"删除计划已执行 {done} 条操作")
+        finally:
+            metrics.freed(counts['bytes'])
+            self._finish_metrics(metrics)
+        os.replace(plan_path, plan_path.with_name(plan_path.stem + ".applied" + plan_path.suffix))
+        logger.info(f"删除计划执行完成，共删除了 {counts['files']} 个文件、{counts['empty_dirs']} 个空目录、"
+                    f"{counts['small_dirs']} 个小目录，{'移入回收站' if trash else '释放'} "
+                    f"{counts['bytes'] / 1024 / 1024:.2f} MB，"
+                    f"{counts['skipped']} 条操作因内容变化跳过")
 
-    def delete_empty_dirs(self):
-        logger.info("开始删除空目录 ...")
-        deleted_dirs = []
-        exclude_keywords = [kw.strip() for kw in self._keywords.split(",") if kw.strip()]  # 添加排除关键词
-
-        for mon_path in self._dirconf.keys():
-            for root, dirs, _ in os.walk(mon_path, topdown=False):
-                for dir_name in dirs:
-                    dir_path = os.path.join(root, dir_name)
-
-                    # 检查目录是否包含排除关键词
-                    if any(exclude_kw in dir_path for exclude_kw in exclude_keywords):
-                        logger.info(f"目录 {dir_path} 包含排除关键词，跳过删除。")
+    @classmethod
+    def _apply_batch(cls, pool: ThreadPoolExecutor, batch: List[PlanOp], metrics: RunMetrics,
+                     trash: Optional[Trash] = None) -> Counter:
+        """
+        执行一批操作：文件按所在目录分组，各目录并发删除，每个目录只打开一次；
+        计划按后序生成，批内的目录只依赖此前的操作，待本批文件全部删除后再按计划顺序删除目录。
+        文件大小与生成计划时不一致的不删除，其所在目录随后因非空删除失败而保留
+        """
+        groups: Dict[str, List[PlanOp]] = {}
+        rmdirs: List[PlanOp] = []
+        for op in batch:
+            if op.op == OP_UNLINK:
+                groups.setdefault(os.path.dirname(op.path), []).append(op)
+            elif op.op == OP_RMDIR:
+                rmdirs.append(op)
+        counts = Counter()
+        for group_counts in pool.map(partial(cls._apply_unlinks, metrics=metrics, trash=trash), groups.values()):
+            counts.update(group_counts)
+        fds = DirFds(metrics, trash)
+        try:
+            for op in rmdirs:
+                try:
+                    fds.rmdir(op.path)
+                    counts['empty_dirs' if op.rule == RULE_EMPTY_DIR else 'small_dirs'] += 1
+                except FileNotFoundError:
+                    counts['skipped'] += 1
+                except OSError as e:
+                    logger.error(f"执行删除计划 {op.path} 失败：{e}")
+                    counts['skipped'] += 1
+        finally:
+            fds.close()
+        return counts
+
+    @staticmethod
+    def _apply_unlinks(ops: List[PlanOp], metrics: RunMetrics, trash: Optional[Trash] = None) -> Counter:
+        """
+        删除同一目录下的一组文件
+        """
+        counts = Counter()
+        fds = DirFds(metrics, trash)
+        try:
+            for op in ops:
+                try:
+                    if not fds.unlink(op.path, op.size):
+                        logger.info(f"文件 {op.path} 在生成计划后发生变化，跳过删除。")
+                        counts['skipped'] += 1
                         continue
+                    counts['bytes'] += op.size
+                    if op.rule != RULE_SMALL_DIR:
+                        counts['files'] += 1
+                except FileNotFoundError:
+                    counts['skipped'] += 1
+                except OSError as e:
+                    logger.error(f"执行删除计划 {op.path} 失败：{e}")
+                    counts['skipped'] += 1
+        finally:
+            fds.close()
+        return counts
 
-                    # 检查目录是否为空（没有子文件和子目录）
-                    if os.path.isdir(dir_path) and not os.listdir(dir_path):
-                        try:
-                            os.rmdir(dir_path)
-                            deleted_dirs.append(dir_path)
-                            logger.info(f"成功删除空目录：{dir_path}")
-                        except Exception as e:
-                            logger.error(f"删除空目录 {dir_path} 失败：{e}")
+    def _finish_metrics(self, metrics: RunMetrics):
+        """
+        运行结束后保存统计，插件重启后详情页仍可查看
+        """
+        metrics.finish()
+        data = metrics.to_dict()
+        logger.info(f"本次运行访问 {data['dirs']} 个目录、{data['files']} 个文件，stat {data['stat_calls']} 次，"
+                    f"删除 {data['unlinks']} 个文件、{data['rmdirs']} 个目录，"
+                    f"{describe_bytes(data)}，耗时 {data['duration']} 秒"
+                    f"（列目录 {data['list_time']} 秒，stat {data['stat_time']} 秒，删除 {data['unlink_time']} 秒）")
+        self.save_data("last_run", data)
 
-        logger.info(f"删除空目录操作完成，共删除了 {len(deleted_dirs)} 个目录。")
+    def _new_trash(self, roots: List[str]) -> Optional[Trash]:
+        """
+        启用回收站时为本次运行创建一个批次
+        """
+        return Trash(roots) if self._trash and roots else None
 
+    def purge_trash(self):
+        """
+        清除超过保留天数的回收站批次，在定时任务中于低峰时段运行
+        """
+        purged = purge(list(self._dirconf), self._trash_retention,
+                       onerror=lambda func, path, exc: logger.error(f"清理回收站 {path} 失败：{exc[1]}"))
+        if purged:
+            logger.info(f"回收站清理完成，共清除了 {purged} 个超过 {self._trash_retention} 天的批次")
 
-    def delete_small_dirs(self):
-        logger.info("开始删除小于设定容量的目录 ...")
-        deleted_dirs = []
-        size_threshold = int(self._small_dir_size_threshold) * 1024 * 1024
-        exclude_keywords = [kw.strip() for kw in self._keywords.split(",") if kw.strip()]  # 添加排除关键词
-
-        for mon_path in self._dirconf.keys():
-            for root, dirs, _ in os.walk(mon_path, topdown=False):
-                for dir_name in dirs:
-                    dir_path = os.path.join(root, dir_name)
-                    
-                    # 先检查目录是否包含排除关键词
-                    if any(exclude_kw in dir_path for exclude_kw in exclude_keywords):
-                        logger.info(f"目录 {dir_path} 包含排除关键词，跳过删除。")
-                        continue
+    def list_trash(self) -> List[Dict[str, Any]]:
+        """
+        回收站中的运行批次
+        """
+        return list_runs(list(self._dirconf))
 
-                    # 计算目录大小
-                    dir_size = sum(os.path.getsize(os.path.join(dir_path, f)) for f in os.listdir(dir_path) if os.path.isfile(os.path.join(dir_path, f)))
+    def restore_trash(self, run: str) -> Dict[str, Any]:
+        """
+        把一个运行批次移入回收站的内容恢复到原位置
+        """
+        if not any(item["run"] == run for item in self.list_trash()):
+            return {"success": False, "message": f"回收站中没有批次 {run}"}
+        restored, skipped = restore(list(self._dirconf), run,
+                                    onerror=lambda e: logger.error(f"恢复回收站文件失败：{e}"))
+        logger.info(f"回收站批次 {run} 恢复完成，恢复 {restored} 个文件，{skipped} 个文件因原位置已存在或出错保留在回收站")
+        return {"success": True, "message": f"恢复 {restored} 个文件，跳过 {skipped} 个",
+                "restored": restored, "skipped": skipped}
 
-                    # 检查是否小于设定的阈值
-                    if dir_size < size_threshold:
-                        try:
-                            os.rmdir(dir_path)
-                            deleted_dirs.append(dir_path)
-                            logger.info(f"成功删除目录：{dir_path}，小于设定容量：{self._small_dir_size_threshold} MB")
-                        except Exception as e:
-                            logger.error(f"删除目录 {dir_path} 失败：{e}")
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        正在进行或最近一次运行的统计
+        """
+        if self._metrics:
+            return self._metrics.to_dict()
+        return self.get_data("last_run") or {}
 
-        if deleted_dirs:
-            logger.info(f"全部目录删除操作完成，共删除了 {len(deleted_dirs)} 个小于 {self._small_dir_size_threshold} MB 的目录。")
-        else:
-            logger.info(f"未找到小于 {self._small_dir_size_threshold} MB的目录，跳过操作。")
+    def _plan_path(self) -> Path:
+        return self.get_data_path() / "delete_plan.jsonl"
 
+    def _rules_fingerprint(self, files: bool, empty_dirs: bool, small_dirs: bool) -> str:
+        return json.dumps([files, empty_dirs, small_dirs, self._small_dir_size_threshold, self._keywords,
+                           self._rules_text, self._min_file_age, self._unique_sizes])
+
+    def _open_checkpoint(self, files: bool, empty_dirs: bool, small_dirs: bool,
+                         run_paths: List[str], partial_run: bool = False) -> Optional[Checkpoint]:
+        """
+        读取断点记录，删除规则或监控目录变化时从头开始；
+        只处理部分目录的任务（实时模式的轮询）按目录集合单独记录，不覆盖或删除定时任务的断点
+        """
+        key = json.dumps([self._rules_fingerprint(files, empty_dirs, small_dirs), run_paths])
+        filename = "checkpoint.json"
+        if partial_run:
+            digest = hashlib.md5(json.dumps(run_paths).encode("utf-8")).hexdigest()[:12]
+            filename = f"checkpoint-{digest}.json"
+        try:
+            checkpoint = Checkpoint(self.get_data_path() / filename, key, run_paths)
+        except Exception as e:
+            logger.error(f"读取断点记录失败：{e}")
+            return None
+        if checkpoint.resumed:
+            logger.info(f"上次删除任务未完成，从中断处继续，跳过 {len(checkpoint.resume_points)} 个已处理的目录")
+        return checkpoint
+
+    def _open_index(self, files: bool, empty_dirs: bool, small_dirs: bool) -> Optional[ScanIndex]:
+        """
+        打开增量扫描索引，删除规则变化时索引自动失效
+        """
+        fingerprint = self._rules_fingerprint(files, empty_dirs, small_dirs)
+        # 小目录的保留天数按 mtime 判断
+        now = time.time()
+        mtime_age = max(self._file_rules.max_age(), self._min_file_age * 86400)
+        ctime_age = self._file_rules.max_age(ctime=True)
+        try:
+            return ScanIndex(self.get_data_path() / "scan_index.db", fingerprint,
+                             mtime_cutoff=now - mtime_age if mtime_age else None,
+                             ctime_cutoff=now - ctime_age if ctime_age else None)
+        except Exception as e:
+            logger.error(f"打开扫描索引失败，本次全量扫描：{e}")
+            return None
+
+    @staticmethod
+    def _scan_monitor_dir(pool: ThreadPoolExecutor, scan_unit: Callable[..., Counter],
+                          mon_path: str) -> Tuple[Counter, List[Future]]:
+        """
+        处理监控目录下的直接文件，并把每个一级子目录作为独立子树提交到线程池
+        """
+        logger.info(f"当前监控路径: {mon_path}")
+        subtree_futures = []
+
+        def spawn(child: DirNode) -> bool:
+            # 子树使用独立的父节点，各线程之间不共享目录计数
+            parent = DirNode(mon_path, state=child.parent.state)
+            subtree_futures.append(pool.submit(scan_unit, child.path, parent))
+            return True
+
+        return scan_unit(mon_path, spawn=spawn), subtree_futures
+
+    def _scan_unit(self, root: str, parent: Optional[DirNode] = None,
+                   spawn: Optional[Callable[[DirNode], bool]] = None, files: bool = False,
+                   empty_dirs: bool = False, small_dirs: bool = False, size_threshold: int = 0,
+                   index: Optional[ScanIndex] = None, plan: Optional[PlanWriter] = None,
+                   checkpoint: Optional[Checkpoint] = None, metrics: Optional[RunMetrics] = None,
+                   trash: Optional[Trash] = None, inodes: Optional[InodeLedger] = None,
+                   rules: Optional[RuleSet] = None) -> Counter:
+        """
+        在一个线程内遍历并处理一棵子树，返回删除计数；传入 plan 时只模拟删除并写入计划，传入 trash 时移入回收站
+        同一次运行的各子树共用 inodes，释放的空间按硬链接计算；rules 为空时使用配置的文件删除规则
+        """
+        counts = checkpoint.track(Counter()) if checkpoint else Counter()
+        fds = DirFds(metrics, trash)
+        inodes = inodes or InodeLedger()
+        try:
+            events = scan_tree(root,
+                               onerror=lambda e: logger.error(f"读取目录失败：{e}"),
+                               stat_files=files or small_dirs,
+                               matcher=self._matcher,
+                               parent=parent,
+                               spawn=spawn,
+                               index=index,
+                               done=checkpoint.resume_points if checkpoint else None,
+                               metrics=metrics,
+                               unique_sizes=self._unique_sizes)
+            if files:
+                events = self._filter_files(events, rules if rules is not None else self._file_rules)
+            else:
+                events = ((node, None, 0, None) for node, entry in events if entry is None)
+            for node, entry, file_size, rule in events:
+                if self._stop_event.is_set():
+                    break
+                if entry is not None:
+                    if self._delete_file(node, entry, file_size, rule, fds, plan):
+                        counts['files'] += 1
+                        counts['bytes'] += inodes.released(entry)
+                        if not plan and metrics is not None and metrics.unlinks % self._LOG_EVERY == 0:
+                            logger.info(f"已删除 {metrics.unlinks} 个文件，当前：{entry.path}")
+                    continue
+
+                # 监控目录本身不删除
+                if node.parent is not None and (empty_dirs or small_dirs):
+                    self._process_dir(node, counts, fds, empty_dirs, small_dirs, size_threshold, plan, inodes)
+                # 目录处理完成，之后不会再删除其中的内容
+                fds.release(node.path)
+                if checkpoint:
+                    checkpoint.complete(node)
+        except Exception as e:
+            logger.error(f"处理目录 {root} 时发生异常: {e}", exc_info=True)
+        finally:
+            fds.close()
+        return counts
+
+    def _process_dir(self, node: DirNode, counts: Counter, fds: DirFds, empty_dirs: bool, small_dirs: bool,
+                     size_threshold: int, plan: Optional[PlanWriter] = None, inodes: Optional[InodeLedger] = None):
+        """
+        目录完成事件：按规则删除空目录或小目录
+        """
+        # 命中排除关键词的目录在扫描时已整体剪枝，其中内容不会被列出
+        if node.excluded:
+            logger.debug(f"目录 {node.path} 包含排除关键词，跳过删除。")
+            return
+        # 检查目录是否为空（没有子文件和子目录）
+        # children 在遍历中随文件删除、子目录删除递减，整棵空子树可在一次遍历中自底向上删除
+        if empty_dirs and node.children == 0:
+            if self._remove_dir(node, fds, plan, RULE_EMPTY_DIR):
+                counts['empty_dirs'] += 1
+                if not plan:
+                    logger.debug(f"成功删除空目录：{node.path}")
+            return
+        # node.size 为遍历中自底向上汇总的整棵子树大小，更小的子目录此前已被删除，
+        # 这里只需清理剩余的直接文件
+        if small_dirs and node.size < size_threshold:
+            freed = self._clear_small_dir(node, fds, plan, inodes or InodeLedger())
+            if freed is not None:
+                counts['small_dirs'] += 1
+                counts['bytes'] += freed
+                if not plan:
+                    logger.debug(f"成功删除目录：{node.path}，小于设定容量：{self._small_dir_size_threshold} MB")
+
+    def _filter_files(self, events: Iterator[Tuple[DirNode, Optional[os.DirEntry]]], rules: RuleSet
+                      ) -> Iterator[Tuple[DirNode, Optional[os.DirEntry], int, Optional[str]]]:
+        """
+        过滤阶段：只放行命中删除规则的文件，附带计入目录大小的字节数和命中的规则名，目录完成事件原样透传
+        """
+        now = time.time()
+        for node, entry in events:
+            if entry is None:
+                yield node, None, 0, None
+                continue
+            # 在删除文件之前检查排除关键词，命中的目录已在扫描时剪枝，这里只需从目录状态继续匹配文件名
+            if self._matcher.child(node.state, entry.name)[1]:
+                logger.debug(f"文件 {entry.path} 包含排除关键词，跳过删除。")
+                continue
+            # DirEntry 已缓存 stat 结果，大小和时间条件不再产生系统调用
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            rule = rules.match(entry.name, stat, now)
+            if rule is None:
+                logger.debug(f"文件 {entry.path} 不符合删除规则，跳过删除。")
+                continue
+            yield node, entry, tree_size(stat, self._unique_sizes), rule
+
+    @staticmethod
+    def _delete_file(node: DirNode, entry: os.DirEntry, file_size: int, rule: str, fds: DirFds,
+                     plan: Optional[PlanWriter] = None) -> bool:
+        if plan:
+            # 计划中记录文件自身的大小，执行时据此确认文件未变化
+            plan.unlink(entry.path, entry.stat().st_size, rule)
+            node.discard(file_size)
+            return True
+        logger.debug(f"找到文件：{entry.path}，大小：{file_size / 1024 / 1024:.2f} MB，命中规则：{rule}")
+        try:
+            fds.unlink(entry.path)
+            node.discard(file_size)
+            logger.debug(f"成功删除文件: {entry.path}")
+            return True
+        except Exception as e:
+            logger.error(f"删除文件 {entry.path} 失败：{e}")
+            return False
+
+    @staticmethod
+    def _remove_dir(node: DirNode, fds: DirFds, plan: Optional[PlanWriter] = None,
+                    rule: str = RULE_EMPTY_DIR) -> bool:
+        if plan:
+            plan.rmdir(node.path, rule)
+            node.removed = True
+            return True
+        try:
+            fds.rmdir(node.path)
+            node.removed = True
+            return True
+        except Exception as e:
+            logger.error(f"删除目录 {node.path} 失败：{e}")
+            return False
+
+    def _clear_small_dir(self, node: DirNode, fds: DirFds, plan: Optional[PlanWriter],
+                         inodes: InodeLedger) -> Optional[int]:
+        """
+        清理小目录中剩余的直接文件后删除目录，返回释放的字节数，目录未删除时返回 None；
+        遍历时不保留文件列表，这里只对命中的小目录重新列一次
+        """
+        if node.subdirs:
+            logger.info(f"目录 {node.path} 仍有未删除的子目录，跳过删除。")
+            return None
+        # 生成计划时文件并未真正删除，计划中已包含全部直接文件则不再重新列目录，避免重复记录
+        if plan and node.children == 0:
+            return 0 if self._remove_dir(node, fds, plan, RULE_SMALL_DIR) else None
+        try:
+            with os.scandir(node.path) as it:
+                entries = list(it)
+        except OSError as e:
+            logger.error(f"读取目录 {node.path} 失败：{e}")
+            return None
+        if any(self._matcher.child(node.state, entry.name)[1] for entry in entries):
+            logger.info(f"目录 {node.path} 中有文件包含排除关键词，跳过删除。")
+            return None
+        if self._has_young_file(entries):
+            logger.debug(f"目录 {node.path} 中有未到保留时间的文件，跳过删除。")
+            return None
+        freed = 0
+        for entry in entries:
+            size = entry_size(entry, self._unique_sizes)
+            if plan:
+                plan.unlink(entry.path, entry_size(entry), RULE_SMALL_DIR)
+            else:
+                try:
+                    fds.unlink(entry.path)
+                except Exception as e:
+                    logger.error(f"删除文件 {entry.path} 失败：{e}")
+                    return None
+            node.discard(size)
+            freed += inodes.released(entry)
+        return freed if self._remove_dir(node, fds, plan, RULE_SMALL_DIR) else None
+
+    def _has_young_file(self, entries: List[os.DirEntry]) -> bool:
+        """
+        小目录中是否有未到最小保留天数的文件；stat 结果由 DirEntry 缓存，随后计算大小时复用
+        """
+        if not self._min_file_age:
+            return False
+        cutoff = time.time() - self._min_file_age * 86400
+        for entry in entries:
+            try:
+                if entry.stat().st_mtime > cutoff:
+                    return True
+            except OSError:
+                continue
+        return False
 
-        
     def __update_config(self):
         config_update = {
             "enabled": self._enabled,
             "onlyonce": self._onlyonce,
             "monitor_dirs": self._monitor_dirs,
             "keywords": self._keywords,
+            "rules": self._rules_text,
             "delete_empty_dirs": self._delete_empty_dirs,
             "delete_small_dirs": self._delete_small_dirs,
             "small_dir_size_threshold": self._small_dir_size_threshold,
+            "min_file_age": self._min_file_age,
+            "unique_sizes": self._unique_sizes,
+            "scan_workers": self._scan_workers,
+            "incremental": self._incremental,
+            "realtime": self._realtime,
+            "debounce": self._debounce,
+            "poll_interval": self._poll_interval,
+            "run_mode": self._run_mode,
+            "trash": self._trash,
+            "trash_retention": self._trash_retention,
+            "trash_purge_cron": self._trash_purge_cron,
             "delete_files_enabled": self._delete_files_enabled
         }
         
@@ -272,7 +821,25 @@ class FileDelete(_PluginBase):
         pass
 
     def get_api(self) -> List[Dict[str, Any]]:
-        pass
+        return [{
+            "path": "/metrics",
+            "endpoint": self.get_metrics,
+            "methods": ["GET"],
+            "summary": "运行统计",
+            "description": "获取正在进行或最近一次删除任务的统计",
+        }, {
+            "path": "/trash",
+            "endpoint": self.list_trash,
+            "methods": ["GET"],
+            "summary": "回收站批次",
+            "description": "列出回收站中保留的运行批次",
+        }, {
+            "path": "/trash/restore",
+            "endpoint": self.restore_trash,
+            "methods": ["POST"],
+            "summary": "恢复回收站批次",
+            "description": "把指定运行批次移入回收站的文件恢复到原位置",
+        }]
 
     def get_service(self) -> List[Dict[str, Any]]:
         if self._enabled:
@@ -392,7 +959,7 @@ class FileDelete(_PluginBase):
                                         'props': {
                                             'model': 'small_dir_size_threshold',
                                             'label': '删除多大文件/目录 (MB)',
-                                            'placeholder': '设置小于此值的文件或目录将被删除'
+                                            'placeholder': '小于此值的文件，或小于此值的目录连同其中文件，将被删除'
                                         }
                                     }
                                 ]
@@ -435,6 +1002,208 @@ class FileDelete(_PluginBase):
                                         }
                                     }
                                 ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'scan_workers',
+                                            'label': '扫描线程数',
+                                            'placeholder': '并发扫描的线程数，默认4'
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSwitch',
+                                        'props': {
+                                            'model': 'incremental',
+                                            'label': '增量扫描',
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSwitch',
+                                        'props': {
+                                            'model': 'realtime',
+                                            'label': '实时监控',
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 2
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'debounce',
+                                            'label': '事件合并(秒)',
+                                            'placeholder': '文件写入完成多少秒后处理，不少于 600'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 2
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'poll_interval',
+                                            'label': '网络挂载扫描间隔(分钟)',
+                                            'placeholder': '不支持文件事件的目录定时全量扫描'
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSelect',
+                                        'props': {
+                                            'model': 'run_mode',
+                                            'label': '运行模式',
+                                            'items': [
+                                                {'title': '直接删除', 'value': 'delete'},
+                                                {'title': '仅生成删除计划', 'value': 'plan'},
+                                                {'title': '执行删除计划', 'value': 'apply'}
+                                            ]
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'min_file_age',
+                                            'label': '最小保留天数',
+                                            'placeholder': '修改时间不足此天数的文件和小目录不删除，0为不限制'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSwitch',
+                                        'props': {
+                                            'model': 'unique_sizes',
+                                            'label': '目录大小按硬链接去重'
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSwitch',
+                                        'props': {
+                                            'model': 'trash',
+                                            'label': '删除时移入回收站'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'trash_retention',
+                                            'label': '回收站保留天数',
+                                            'placeholder': '超过此天数的批次由定时任务清除，默认7'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'trash_purge_cron',
+                                            'label': '回收站清理周期',
+                                            'placeholder': '5位cron表达式，建议设在低峰时段'
+                                        }
+                                    }
+                                ]
                             }
                         ]
                     },
@@ -482,6 +1251,31 @@ class FileDelete(_PluginBase):
                             }
                         ]
                     },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextarea',
+                                        'props': {
+                                            'model': 'rules',
+                                            'label': '文件删除规则',
+                                            'rows': 3,
+                                            'placeholder': "每行一条规则，条件以分号分隔，留空则删除小于设定容量的文件\n"
+                                                           "name=字幕图片;ext=nfo,jpg,png;max=5MB;age=7d\n"
+                                                           "name=旧日志;ext=log;age=30d;time=ctime\n"
+                                                           "name=样片;include=*sample*;exclude=*keep*;regex=...;min=0;max=200MB"
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
                     {
                         'component': 'VRow',
                         'content': [
@@ -503,6 +1297,27 @@ class FileDelete(_PluginBase):
                             }
                         ]
                     },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VAlert',
+                                        'props': {
+                                            'type': 'warning',
+                                            'variant': 'tonal',
+                                            'text': '注意：删除全部目录会把整棵子树小于设定容量的目录连同其中的所有文件一起删除，不只是空目录；开启前请确认容量阈值，建议同时开启回收站'
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
                     {
                         'component': 'VRow',
                         'content': [
@@ -532,14 +1347,30 @@ class FileDelete(_PluginBase):
             "monitor_dirs": "",
             "cron": "",
             "delay": "20,1-10",
+            "scan_workers": 4,
+            "incremental": False,
+            "realtime": False,
+            "debounce": 10,
+            "poll_interval": 60,
+            "run_mode": "delete",
+            "min_file_age": 0,
+            "unique_sizes": False,
+            "trash": False,
+            "trash_retention": 7,
+            "trash_purge_cron": "0 5 * * *",
             "keywords": "",
+            "rules": "",
             "delete_files_enabled": False  # 添加这一行
         }
 
     def get_page(self) -> List[dict]:
-        pass
+        return render_page(self.get_metrics())
 
     def stop_service(self):
+        self._stop_event.set()
+        if self._watcher:
+            self._watcher.stop()
+            self._watcher = None
         if self._scheduler:
             self._scheduler.remove_all_jobs()
             if self._scheduler.running:
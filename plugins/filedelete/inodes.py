@@ -0,0 +1,44 @@
+import os
+import threading
+from typing import Dict, Tuple
+
+
+def tree_size(stat: os.stat_result, unique: bool = False) -> int:
+    """
+    文件计入目录大小的字节数；unique 为 True 时按 inode 去重：
+    有多个硬链接的文件每个链接只计 st_size / st_nlink，同一 inode 的所有链接合计恰好一份大小
+    """
+    if unique and stat.st_nlink > 1:
+        return stat.st_size // stat.st_nlink
+    return stat.st_size
+
+
+class InodeLedger:
+    """
+    按 (st_dev, st_ino) 统计本次运行实际释放的空间：只有一个链接的文件删除即释放；
+    有多个硬链接的文件在本次运行删除了它的全部链接时才释放，此前删除的链接不计
+    只记录有多个链接的 inode，每个文件的开销为常数
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._removed: Dict[Tuple[int, int], int] = {}
+
+    def released(self, entry: os.DirEntry) -> int:
+        """
+        删除一个文件后调用，使用 DirEntry 缓存的 stat 结果，返回实际释放的字节数
+        """
+        try:
+            stat = entry.stat()
+        except OSError:
+            return 0
+        if stat.st_nlink <= 1:
+            return stat.st_size
+        key = (stat.st_dev, stat.st_ino)
+        with self._lock:
+            removed = self._removed.get(key, 0) + 1
+            if removed < stat.st_nlink:
+                self._removed[key] = removed
+                return 0
+            self._removed.pop(key, None)
+        return stat.st_size
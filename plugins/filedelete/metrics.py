@@ -0,0 +1,150 @@
+import heapq
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+
+class RunMetrics:
+    """
+    单次运行的统计：访问的目录和文件数、stat 次数、删除次数和释放的空间，
+    列目录、stat、删除各自的耗时，以及列目录最慢的若干个目录
+    扫描器每个目录汇总一次，删除每次操作汇总一次，多个线程共用一个实例
+    trash 为 True 表示本次运行移入回收站，空间在清除回收站时才释放，删除的大小计入 bytes_trashed
+    """
+
+    # 保留最慢目录的数量
+    _SLOWEST = 10
+
+    def __init__(self, trash: bool = False):
+        self._lock = threading.Lock()
+        self.trash = trash
+        self.started = time.time()
+        self.finished = 0.0
+        self.dirs = 0
+        self.files = 0
+        self.stat_calls = 0
+        self.unlinks = 0
+        self.rmdirs = 0
+        self.bytes_freed = 0
+        self.bytes_trashed = 0
+        self.list_time = 0.0
+        self.stat_time = 0.0
+        self.unlink_time = 0.0
+        self._slowest: List[Tuple[float, str]] = []
+
+    def dir_listed(self, path: str, list_time: float, files: int = 0, stat_calls: int = 0, stat_time: float = 0.0):
+        with self._lock:
+            self.dirs += 1
+            self.files += files
+            self.stat_calls += stat_calls
+            self.list_time += list_time
+            self.stat_time += stat_time
+            elapsed = list_time + stat_time
+            if len(self._slowest) < self._SLOWEST:
+                heapq.heappush(self._slowest, (elapsed, path))
+            elif elapsed > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, (elapsed, path))
+
+    def deleted(self, elapsed: float, is_dir: bool = False):
+        with self._lock:
+            self.unlink_time += elapsed
+            if is_dir:
+                self.rmdirs += 1
+            else:
+                self.unlinks += 1
+
+    def freed(self, size: int):
+        with self._lock:
+            if self.trash:
+                self.bytes_trashed += size
+            else:
+                self.bytes_freed += size
+
+    def finish(self):
+        self.finished = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            slowest = sorted(self._slowest, reverse=True)
+            return {
+                "started": self.started,
+                "finished": self.finished,
+                "duration": round((self.finished or time.time()) - self.started, 3),
+                "dirs": self.dirs,
+                "files": self.files,
+                "stat_calls": self.stat_calls,
+                "unlinks": self.unlinks,
+                "rmdirs": self.rmdirs,
+                "bytes_freed": self.bytes_freed,
+                "bytes_trashed": self.bytes_trashed,
+                "list_time": round(self.list_time, 3),
+                "stat_time": round(self.stat_time, 3),
+                "unlink_time": round(self.unlink_time, 3),
+                "slowest_dirs": [{"path": path, "seconds": round(elapsed, 3)} for elapsed, path in slowest],
+            }
+
+
+def _table(headers: List[str], rows: List[List[Any]]) -> dict:
+    return {
+        'component': 'VTable',
+        'props': {'hover': True},
+        'content': [
+            {
+                'component': 'thead',
+                'content': [{'component': 'th', 'props': {'class': 'text-start ps-4'}, 'text': header}
+                            for header in headers]
+            },
+            {
+                'component': 'tbody',
+                'content': [{'component': 'tr', 'content': [{'component': 'td', 'text': str(cell)} for cell in row]}
+                            for row in rows]
+            }
+        ]
+    }
+
+
+def _card(title: str, content: dict) -> dict:
+    return {
+        'component': 'VCard',
+        'props': {'class': 'mb-3'},
+        'content': [{'component': 'VCardTitle', 'text': title}, content]
+    }
+
+
+def describe_bytes(data: Dict[str, Any]) -> str:
+    """
+    运行日志中的空间统计，回收站模式下移入回收站的大小单独列出
+    """
+    text = f"释放 {data['bytes_freed'] / 1024 / 1024:.2f} MB"
+    if data.get("bytes_trashed"):
+        text += f"，移入回收站 {data['bytes_trashed'] / 1024 / 1024:.2f} MB（清除回收站后释放）"
+    return text
+
+
+def render_page(data: Dict[str, Any]) -> List[dict]:
+    """
+    把 RunMetrics.to_dict() 的结果渲染为插件详情页
+    """
+    if not data:
+        return [{'component': 'div', 'text': '暂无数据', 'props': {'class': 'text-center'}}]
+    started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(data["started"]))
+    summary = [
+        ["开始时间", started + ("" if data.get("finished") else "（运行中）")],
+        ["耗时", f"{data['duration']} 秒"],
+        ["访问目录", data["dirs"]],
+        ["访问文件", data["files"]],
+        ["stat 次数", data["stat_calls"]],
+        ["删除文件", data["unlinks"]],
+        ["删除目录", data["rmdirs"]],
+        ["释放空间", f"{data['bytes_freed'] / 1024 / 1024:.2f} MB"],
+        ["列目录耗时", f"{data['list_time']} 秒"],
+        ["stat 耗时", f"{data['stat_time']} 秒"],
+        ["删除耗时", f"{data['unlink_time']} 秒"],
+    ]
+    if data.get("bytes_trashed"):
+        summary.insert(8, ["移入回收站", f"{data['bytes_trashed'] / 1024 / 1024:.2f} MB（清除回收站后释放）"])
+    slowest = [[item["path"], f"{item['seconds']} 秒"] for item in data.get("slowest_dirs") or []]
+    return [
+        _card("最近一次运行", _table(["项目", "数值"], summary)),
+        _card("列目录最慢的目录", _table(["目录", "耗时"], slowest)),
+    ]
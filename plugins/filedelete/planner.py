@@ -0,0 +1,108 @@
+import json
+import os
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+# 计划中的操作类型
+OP_UNLINK = "unlink"
+OP_RMDIR = "rmdir"
+
+# 命中的规则
+RULE_FILE = "file"
+RULE_EMPTY_DIR = "empty_dir"
+RULE_SMALL_DIR = "small_dir"
+
+
+class PlanOp:
+    """
+    删除计划中的一条操作；size 为生成计划时文件的大小，执行前用于确认文件没有变化
+    """
+    __slots__ = ("op", "path", "size", "rule")
+
+    def __init__(self, op: str, path: str, size: int = 0, rule: str = ""):
+        self.op = op
+        self.path = path
+        self.size = size
+        self.rule = rule
+
+
+class PlanWriter:
+    """
+    以 JSON Lines 流式写入删除计划，每行一个紧凑的数组，内存占用与计划大小无关
+    操作按遍历的后序写入，同一子树内目录总是排在其中的文件之后，可以按顺序直接执行；
+    多个扫描线程共用一个 writer，单行写入加锁
+    """
+
+    def __init__(self, plan_path: Path, fingerprint: str):
+        self.path = plan_path
+        self._tmp_path = plan_path.with_name(plan_path.name + ".tmp")
+        self._lock = threading.Lock()
+        self._file = open(self._tmp_path, "w", encoding="utf-8")
+        self._write({"created": int(time.time()), "rules": fingerprint})
+
+    def _write(self, record):
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def unlink(self, path: str, size: int, rule: str):
+        self._write([OP_UNLINK, path, size, rule])
+
+    def rmdir(self, path: str, rule: str):
+        self._write([OP_RMDIR, path, 0, rule])
+
+    def total(self, mon_path: str, counts: Counter):
+        """
+        写入一个监控目录的汇总
+        """
+        self._write({"monitor": mon_path, **counts})
+
+    def close(self, complete: bool = True):
+        """
+        计划完整生成后才替换正式的计划文件，中断的计划不会被执行
+        """
+        self._file.close()
+        if complete:
+            os.replace(self._tmp_path, self.path)
+        else:
+            os.remove(self._tmp_path)
+
+
+def read_plan(plan_path: Path, batch_size: int = 500) -> Iterator[List[PlanOp]]:
+    """
+    按批读取删除计划中的操作，汇总行和文件头跳过
+    """
+    batch: List[PlanOp] = []
+    with open(plan_path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if not isinstance(record, list):
+                continue
+            batch.append(PlanOp(*record))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def read_summary(plan_path: Path) -> Optional[dict]:
+    """
+    读取计划文件头和各监控目录的汇总
+    """
+    if not plan_path.exists():
+        return None
+    summary = {"monitors": []}
+    with open(plan_path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("["):
+                continue
+            record = json.loads(line)
+            if "monitor" in record:
+                summary["monitors"].append(record)
+            else:
+                summary.update(record)
+    return summary
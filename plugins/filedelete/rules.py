@@ -0,0 +1,183 @@
+import fnmatch
+import os
+import re
+from typing import Dict, List, Optional, Pattern, Tuple
+
+_SIZE_UNITS = {"": 1024 * 1024, "B": 1, "K": 1024, "KB": 1024, "M": 1024 * 1024, "MB": 1024 * 1024,
+               "G": 1024 ** 3, "GB": 1024 ** 3}
+_AGE_UNITS = {"": 86400, "D": 86400, "H": 3600, "M": 60}
+# 开头的全局内联标志，合并时改写为只作用于该分支的局部标志
+_LEADING_FLAGS = re.compile(r"^\(\?([imsx]+)\)(.*)$", re.DOTALL)
+
+
+class Rule:
+    """
+    一条文件删除规则，所有条件同时满足才命中：
+    扩展名集合、文件名包含/排除通配符、文件名正则、大小范围（字节）、最小文件年龄（秒，按 mtime 或 ctime）
+    """
+    __slots__ = ("name", "exts", "include", "exclude", "regex", "min_size", "max_size", "min_age", "use_ctime")
+
+    def __init__(self, name: str, exts: Tuple[str, ...] = (), include: Optional[Pattern] = None,
+                 exclude: Optional[Pattern] = None, regex: Optional[Pattern] = None,
+                 min_size: int = 0, max_size: Optional[int] = None, min_age: float = 0, use_ctime: bool = False):
+        self.name = name
+        self.exts = exts
+        self.include = include
+        self.exclude = exclude
+        self.regex = regex
+        self.min_size = min_size
+        self.max_size = max_size
+        self.min_age = min_age
+        self.use_ctime = use_ctime
+
+
+class RuleSet:
+    """
+    编译后的规则集，多条清理规则共用一次遍历，每个文件只判断一次，返回第一条命中的规则名
+    按扩展名预先分组，先一次哈希查找得到候选规则；各规则的正则合并为一个分支表达式，
+    文件名不匹配任何正则时带正则的规则一次全部排除；大小、年龄这类廉价条件先于正则判断
+    """
+
+    def __init__(self, rules: List[Rule]):
+        self.rules = rules
+        # 不限扩展名的规则适用于所有文件，按规则顺序并入每个扩展名的候选列表
+        self._any: Tuple[Rule, ...] = tuple(rule for rule in rules if not rule.exts)
+        self._by_ext: Dict[str, Tuple[Rule, ...]] = {
+            ext: tuple(rule for rule in rules if not rule.exts or ext in rule.exts)
+            for ext in {ext for rule in rules for ext in rule.exts}
+        }
+        patterns = [_LEADING_FLAGS.sub(r"(?\1:\2)", rule.regex.pattern) for rule in rules if rule.regex is not None]
+        try:
+            self._regex = re.compile("|".join(f"(?:{pattern})" for pattern in patterns)) if patterns else None
+        except re.error:
+            # 含无法合并的表达式（例如位于中间的全局标志）时不做预筛选，逐条判断
+            self._regex = None
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def max_age(self, ctime: bool = False) -> float:
+        """
+        按 mtime（ctime 为 True 时按 ctime）判断的规则中最长的年龄条件，没有时为 0
+        """
+        return max((rule.min_age for rule in self.rules if rule.use_ctime == ctime), default=0)
+
+    def with_min_age(self, seconds: float) -> "RuleSet":
+        """
+        返回每条规则的年龄条件都不小于 seconds 的新规则集，原规则集不变
+        """
+        if seconds <= 0:
+            return self
+        rules = []
+        for rule in self.rules:
+            copy = Rule(rule.name)
+            for slot in Rule.__slots__:
+                setattr(copy, slot, getattr(rule, slot))
+            copy.min_age = max(rule.min_age, seconds)
+            rules.append(copy)
+        return RuleSet(rules)
+
+    def match(self, name: str, stat: os.stat_result, now: float) -> Optional[str]:
+        """
+        判断文件是否命中任一规则，返回规则名；stat 为遍历时已缓存的 stat 结果，不再产生系统调用
+        """
+        rules = self._by_ext.get(os.path.splitext(name)[1].lower(), self._any)
+        size = stat.st_size
+        regex_hit = None
+        for rule in rules:
+            if size < rule.min_size or (rule.max_size is not None and size > rule.max_size):
+                continue
+            if rule.min_age and now - (stat.st_ctime if rule.use_ctime else stat.st_mtime) < rule.min_age:
+                continue
+            if rule.regex is not None:
+                if regex_hit is None:
+                    regex_hit = self._regex is None or self._regex.search(name) is not None
+                if not regex_hit or rule.regex.search(name) is None:
+                    continue
+            if rule.include is not None and rule.include.match(name) is None:
+                continue
+            if rule.exclude is not None and rule.exclude.match(name) is not None:
+                continue
+            return rule.name
+        return None
+
+
+def parse_size(text: str) -> int:
+    """
+    解析大小，例如 500K、10MB、1G，不带单位按 MB 计
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([A-Za-z]*)\s*", text)
+    if not match or match.group(2).upper() not in _SIZE_UNITS:
+        raise ValueError(f"无法识别的大小: {text}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def parse_age(text: str) -> float:
+    """
+    解析时长，例如 7d、12h、30m，不带单位按天计
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([A-Za-z]?)\s*", text)
+    if not match or match.group(2).upper() not in _AGE_UNITS:
+        raise ValueError(f"无法识别的时长: {text}")
+    return float(match.group(1)) * _AGE_UNITS[match.group(2).upper()]
+
+
+def _globs(text: str) -> Optional[Pattern]:
+    globs = [glob.strip() for glob in text.split(",") if glob.strip()]
+    if not globs:
+        return None
+    return re.compile("|".join(fnmatch.translate(glob) for glob in globs), re.IGNORECASE)
+
+
+def parse_rules(text: str) -> Tuple[RuleSet, List[str]]:
+    """
+    解析规则配置，每行一条规则，条件以分号分隔，例如：
+    name=字幕图片;ext=nfo,jpg,png,srt;max=5MB;age=7d
+    name=旧日志;ext=log;age=30d;time=ctime
+    name=样片;include=*sample*;exclude=*keep*;max=200MB
+    name=广告;regex=www\\.\\w+\\.com;max=10MB
+    返回 (规则集, 无法解析的行的错误信息)
+    """
+    rules: List[Rule] = []
+    errors: List[str] = []
+    for lineno, line in enumerate((text or "").splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        rule = Rule(f"规则{lineno}")
+        try:
+            for item in line.split(";"):
+                if not item.strip():
+                    continue
+                key, sep, value = item.partition("=")
+                key, value = key.strip().lower(), value.strip()
+                if not sep:
+                    raise ValueError(f"缺少 '=': {item}")
+                if key == "name":
+                    rule.name = value
+                elif key == "ext":
+                    rule.exts = tuple({"." + ext.strip().lstrip(".").lower()
+                                       for ext in value.split(",") if ext.strip()})
+                elif key == "include":
+                    rule.include = _globs(value)
+                elif key == "exclude":
+                    rule.exclude = _globs(value)
+                elif key == "regex":
+                    rule.regex = re.compile(value)
+                elif key == "min":
+                    rule.min_size = parse_size(value)
+                elif key == "max":
+                    rule.max_size = parse_size(value)
+                elif key == "age":
+                    rule.min_age = parse_age(value)
+                elif key == "time":
+                    if value.lower() not in ("mtime", "ctime"):
+                        raise ValueError(f"time 只能为 mtime 或 ctime: {value}")
+                    rule.use_ctime = value.lower() == "ctime"
+                else:
+                    raise ValueError(f"未知条件: {key}")
+        except (ValueError, re.error) as e:
+            errors.append(f"第 {lineno} 行规则无效，已忽略：{e}")
+            continue
+        rules.append(rule)
+    return RuleSet(rules), errors
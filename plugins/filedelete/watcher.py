@@ -0,0 +1,99 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+
+from app.log import logger
+
+# 不会产生 inotify 事件的文件系统类型（远端变化不会通知到本机）；
+# fuseblk（ntfs-3g）、fuse.mergerfs 等本地 FUSE 文件系统能正常产生事件，不在此列
+_NO_EVENT_FSTYPES = ("nfs", "cifs", "smb", "9p", "davfs", "sshfs", "fuse.rclone", "fuse.sshfs", "fuse.s3fs",
+                     "fuse.gcsfuse", "fuse.goofys", "fuse.juicefs", "fuse.alist")
+
+
+def supports_events(path: str) -> bool:
+    """
+    根据 /proc/mounts 判断路径所在挂载点是否能产生文件事件，rclone/NFS/SMB 等远端挂载返回 False
+    """
+    path = os.path.realpath(path)
+    best_mount, best_type = "", ""
+    try:
+        with open("/proc/mounts", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) < 3:
+                    continue
+                mount_point = parts[1].replace("\\040", " ")
+                if (path == mount_point or path.startswith(mount_point.rstrip("/") + "/")) \
+                        and len(mount_point) > len(best_mount):
+                    best_mount, best_type = mount_point, parts[2]
+    except OSError:
+        return True
+    return not best_type.startswith(_NO_EVENT_FSTYPES)
+
+
+class DebouncedWatcher(FileSystemEventHandler):
+    """
+    只监控文件写入完成（close-write）和移入（rename）事件，同一路径在 debounce 秒内没有新事件后才批量回调，
+    避免种子下载完成时的大量连续事件逐个触发处理；
+    新建目录和写入中的文件不产生回调，下载中的目录不会被整体扫描
+    """
+
+    def __init__(self, paths: List[str], callback: Callable[[Set[str]], None], debounce: float = 10):
+        super().__init__()
+        self._paths = paths
+        self._callback = callback
+        self._debounce = debounce
+        self._pending: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._observer: Optional[Observer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._observer = Observer()
+        for path in self._paths:
+            self._observer.schedule(self, path, recursive=True)
+        self._observer.daemon = True
+        self._observer.start()
+        self._thread = threading.Thread(target=self._flush_loop, name="FileDeleteWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._observer:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _touch(self, path: str):
+        with self._lock:
+            self._pending[path] = time.monotonic()
+
+    def on_closed(self, event: FileSystemEvent):
+        # 文件每次写入后关闭都会刷新时间，断续写入的文件在最后一次关闭后才处理
+        if not event.is_directory:
+            self._touch(event.src_path)
+
+    def on_moved(self, event: FileSystemEvent):
+        self._touch(event.dest_path)
+
+    def _flush_loop(self):
+        while not self._stop_event.wait(1):
+            deadline = time.monotonic() - self._debounce
+            with self._lock:
+                ready = {path for path, updated in self._pending.items() if updated <= deadline}
+                for path in ready:
+                    del self._pending[path]
+            if not ready:
+                continue
+            try:
+                self._callback(ready)
+            except Exception as e:
+                logger.error(f"实时处理文件变化失败：{e}", exc_info=True)
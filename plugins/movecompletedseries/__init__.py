@@ -1,20 +1,29 @@
 import os
 import shutil
-from typing import List, Dict, Any, Tuple
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Tuple
 
+from app.chain.media import MediaChain
+from app.core.metainfo import MetaInfo
 from app.plugins import _PluginBase
 from apscheduler.triggers.cron import CronTrigger
 from app.core.config import settings
 from app.log import logger
-from app.schemas.types import NotificationType
+from app.db.mediaserver_oper import MediaServerOper
+from app.schemas.types import MediaType, NotificationType
+
+from .cache import StatusCache, ENDED, RETURNING, NOT_FOUND, ERROR, id_key, name_key
+from .client import RequestMetrics, TmdbClient
+from .ratelimit import TokenBucket
+from .resolver import FolderInfo, parse_folder, pick_result, read_nfo_tmdbid
 
 
 class MoveCompletedSeries(_PluginBase):
     # 插件基本信息
     plugin_name = "完结剧集搬运"
     plugin_desc = "定时检测剧集是否完结，并将其移动到归档目录"
-    plugin_version = "1.1.0"
+    plugin_version = "1.6.3"
     plugin_author = "guyue2005"
     author_url = "https://github.com/guyue2005"
     plugin_icon = "mdi-movie-check"
@@ -25,13 +34,28 @@ class MoveCompletedSeries(_PluginBase):
     # 初始化
     def __init__(self):
         super().__init__()
-        self._cache = {}
+        self._cache: Optional[StatusCache] = None
         self._enabled = False
         self._source_dir = "/media/TVShows"
         self._dest_dir = "/media/CompletedTVShows"
         self._tmdb_api_key = ""
+        # 内置识别查不到时是否直接请求 TMDB API
+        self._raw_fallback = False
+        self._media_chain: Optional[MediaChain] = None
+        self._chain_lock = threading.Lock()
         self._cron = "0 3 * * *"
         self._enable_notify = False
+        # 并发查询剧集状态的线程数
+        self._workers = 8
+        # 直连 TMDB 后备请求的全局限速（每秒请求数），0 为不限速；内置识别由系统自行限速
+        self._rate_limit = 10.0
+        self._limiter = TokenBucket(self._rate_limit)
+        self._event = threading.Event()
+        self._client: Optional[TmdbClient] = None
+        # 状态缓存有效期（天）：已完结、连载中、未找到
+        self._ttl_ended = 30.0
+        self._ttl_returning = 1.0
+        self._ttl_not_found = 7.0
 
     # 插件初始化
     def init_plugin(self, config: dict = None):
@@ -41,10 +65,34 @@ class MoveCompletedSeries(_PluginBase):
         self._source_dir = config.get("source_dir", "/media/TVShows")
         self._dest_dir = config.get("dest_dir", "/media/CompletedTVShows")
         self._tmdb_api_key = config.get("tmdb_api_key", "")
+        # 旧版本配置了密钥的保持直连查询
+        self._raw_fallback = config.get("raw_fallback", bool(self._tmdb_api_key))
         self._cron = config.get("cron", "0 3 * * *")
         self._enable_notify = config.get("enable_notify", False)
+        try:
+            self._workers = max(1, int(config.get("workers") or 8))
+        except (TypeError, ValueError):
+            self._workers = 8
+        try:
+            self._rate_limit = max(0.0, float(config.get("rate_limit", 10)))
+        except (TypeError, ValueError):
+            self._rate_limit = 10.0
+        self._ttl_ended = self._parse_days(config.get("ttl_ended"), 30.0)
+        self._ttl_returning = self._parse_days(config.get("ttl_returning"), 1.0)
+        self._ttl_not_found = self._parse_days(config.get("ttl_not_found"), 7.0)
 
         self.stop_service()
+        try:
+            self._cache = StatusCache(self.get_data_path() / "status_cache.db", self._ttl_ended,
+                                      self._ttl_returning, self._ttl_not_found)
+        except Exception as e:
+            logger.error(f"打开状态缓存失败，本次不使用缓存: {e}")
+            self._cache = None
+        self._limiter = TokenBucket(self._rate_limit, burst=max(1, int(self._rate_limit)))
+        # 每次初始化换用新的停止信号，仍在运行的上一轮扫描保留已置位的旧信号，能够看到停止
+        self._event = threading.Event()
+        self._client = TmdbClient(self._limiter, self._event, pool_size=self._workers) \
+            if self._raw_fallback and self._tmdb_api_key else None
 
         if self._enabled:
             self.add_job(
@@ -65,60 +113,207 @@ class MoveCompletedSeries(_PluginBase):
                 logger.error(f"创建归档目录失败: {e}")
                 return
 
-        for series_name in os.listdir(self._source_dir):
-            path = os.path.join(self._source_dir, series_name)
-            if not os.path.isdir(path):
-                continue
-            try:
-                if self.is_series_completed(series_name):
-                    target_path = os.path.join(self._dest_dir, series_name)
-                    logger.info(f"{series_name} 已完结，移动中...")
-                    shutil.move(path, target_path)
-                    if self._enable_notify:
-                        self.send_notify(f"剧集《{series_name}》已完结，已移动到归档目录。")
-            except Exception as e:
-                logger.error(f"处理剧集 {series_name} 时出错: {e}")
+        try:
+            series_names = [name for name in os.listdir(self._source_dir)
+                            if os.path.isdir(os.path.join(self._source_dir, name))]
+        except OSError as e:
+            logger.error(f"读取源目录 {self._source_dir} 失败: {e}")
+            return
+
+        stop = self._event
+        if self._client:
+            self._client.metrics = RequestMetrics()
+        # 剧集状态在线程池中并发查询，请求共用全局限速；查询结果先返回的剧集先移动
+        moved = 0
+        with ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="MoveCompletedSeries") as pool:
+            futures = {pool.submit(self._resolve_status, name, stop): name for name in series_names}
+            for future in as_completed(futures):
+                series_name = futures[future]
+                if stop.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    logger.info("完结剧集搬运已停止，剩余剧集不再处理")
+                    break
+                try:
+                    if future.result():
+                        self._move_series(series_name)
+                        moved += 1
+                except Exception as e:
+                    logger.error(f"处理剧集 {series_name} 时出错: {e}")
+        if self._cache:
+            self._cache.flush()
+        logger.info(f"完结剧集搬运完成，共检查 {len(series_names)} 部剧集，移动 {moved} 部")
+        if self._client:
+            logger.info(self._client.metrics.summary())
+
+    def _resolve_status(self, series_name: str, stop: threading.Event) -> bool:
+        """
+        在线程池中执行的状态查询，本轮扫描停止后未开始的查询直接跳过
+        """
+        if stop.is_set():
+            return False
+        return self.is_series_completed(series_name, os.path.join(self._source_dir, series_name), stop)
+
+    def _move_series(self, series_name: str):
+        path = os.path.join(self._source_dir, series_name)
+        target_path = os.path.join(self._dest_dir, series_name)
+        logger.info(f"{series_name} 已完结，移动中...")
+        shutil.move(path, target_path)
+        if self._enable_notify:
+            self.send_notify(f"剧集《{series_name}》已完结，已移动到归档目录。")
 
     # 检查剧集是否完结
-    def is_series_completed(self, series_name: str) -> bool:
-        if series_name in self._cache:
-            return self._cache[series_name]
+    def is_series_completed(self, series_name: str, series_path: Optional[str] = None,
+                            stop: Optional[threading.Event] = None) -> bool:
+        stop = stop or self._event
+        key = name_key(series_name)
+        cached = self._cache.get(key) if self._cache else None
+        if cached is not None:
+            if cached.state == ERROR:
+                logger.debug(f"剧集 {series_name} 上次查询出错，退避期内跳过")
+            return cached.state == ENDED
 
+        info = parse_folder(series_name)
         try:
-            # 使用TMDB API查询剧集状态
-            url = "https://api.themoviedb.org/3/search/tv"
-            r = requests.get(url, params={"api_key": self._tmdb_api_key, "query": series_name}, timeout=10)
-            results = r.json().get("results", [])
-            if not results:
+            # 优先从目录名、NFO、媒体库取得 TMDB ID，按 ID 识别，不再搜索
+            series_id, source = self._resolve_tmdbid(info, series_path)
+            if series_id:
+                cached = self._cache.get(id_key(series_id)) if self._cache else None
+                if cached is not None and cached.state != ERROR:
+                    return cached.state == ENDED
+
+            # 通过 MoviePilot 的媒体识别查询，与系统共用识别缓存和代理设置；查不到时按配置直接请求 TMDB
+            found_id, status = self._builtin_status(info, series_id, source)
+            # 媒体识别在网络或 TMDB 异常时同样返回空，只有本地取得的 ID 也识别不到才确定查不到
+            not_found = bool(series_id)
+            if not found_id and self._client:
+                found_id, status = self._raw_status(info, series_id, source)
+                # 直连请求失败会抛出异常，正常返回却查不到说明 TMDB 确实没有
+                not_found = True
+            if not found_id:
+                if not not_found:
+                    logger.warning(f"未识别到剧集：{series_name}，可能是网络或 TMDB 异常")
+                    self._cache_error(key, series_name, stop)
+                    return False
                 logger.warning(f"未找到剧集：{series_name}")
-                self._cache[series_name] = False
-                return False
-            
-            series_id = results[0].get("id")
-            if not series_id:
-                logger.warning(f"未找到剧集ID：{series_name}")
-                self._cache[series_name] = False
+                self._cache_put(key, None, NOT_FOUND)
                 return False
-                
-            # 获取剧集详情
-            detail_url = f"https://api.themoviedb.org/3/tv/{series_id}"
-            r = requests.get(detail_url, params={"api_key": self._tmdb_api_key}, timeout=10)
-            detail = r.json()
-            
+
             # 检查剧集是否已完结
-            status = detail.get("status")
             if status and status.lower() in ["ended", "canceled"]:
                 logger.info(f"剧集 {series_name} 已完结，状态: {status}")
-                self._cache[series_name] = True
+                self._cache_put(key, found_id, ENDED, status)
                 return True
             else:
                 logger.info(f"剧集 {series_name} 未完结，状态: {status}")
-                self._cache[series_name] = False
+                self._cache_put(key, found_id, RETURNING, status)
                 return False
         except Exception as e:
             logger.error(f"检查剧集 {series_name} 状态时出错: {e}")
+            self._cache_error(key, series_name, stop)
             return False
 
+    def _builtin_status(self, info: FolderInfo, series_id: Optional[int],
+                        source: str) -> Tuple[Optional[int], Optional[str]]:
+        """
+        使用 MoviePilot 媒体识别查询剧集状态，有 TMDB ID 时按 ID 识别，否则按标题和年份识别；
+        返回 (TMDB ID, 状态)，识别不到时 ID 为 None
+        """
+        mediainfo = None
+        if series_id:
+            mediainfo = self._get_media_chain().recognize_media(mtype=MediaType.TV, tmdbid=series_id)
+            if not mediainfo:
+                logger.warning(f"{source}中的 TMDB ID {series_id} 无法识别，改为按标题识别：{info.title}")
+        if not mediainfo:
+            meta = MetaInfo(info.title)
+            meta.type = MediaType.TV
+            if info.year:
+                meta.year = info.year
+            mediainfo = self._get_media_chain().recognize_media(meta=meta, mtype=MediaType.TV)
+        if not mediainfo or not mediainfo.tmdb_id:
+            return None, None
+        return mediainfo.tmdb_id, (mediainfo.tmdb_info or {}).get("status") or getattr(mediainfo, "status", None)
+
+    def _get_media_chain(self) -> MediaChain:
+        """
+        媒体识别链在首次查询时创建，插件重新初始化时复用
+        """
+        with self._chain_lock:
+            if self._media_chain is None:
+                self._media_chain = MediaChain()
+            return self._media_chain
+
+    def _raw_status(self, info: FolderInfo, series_id: Optional[int],
+                    source: str) -> Tuple[Optional[int], Optional[str]]:
+        """
+        直接请求 TMDB API 查询剧集状态，仅在内置识别查不到且开启了直连后备时使用
+        """
+        detail = None
+        if series_id:
+            detail = self._client.get(f"/tv/{series_id}", {"api_key": self._tmdb_api_key})
+            if not detail.get("id"):
+                logger.warning(f"{source}中的 TMDB ID {series_id} 无效，改为搜索：{info.title}")
+                series_id, detail = None, None
+        if not series_id:
+            series_id = self._search_tmdbid(info)
+            if not series_id:
+                return None, None
+            # 获取剧集详情
+            detail = self._client.get(f"/tv/{series_id}", {"api_key": self._tmdb_api_key})
+        return series_id, detail.get("status")
+
+    @staticmethod
+    def _resolve_tmdbid(info: FolderInfo, series_path: Optional[str]) -> Tuple[Optional[int], str]:
+        """
+        依次从目录名中的 tmdbid 标记、tvshow.nfo、MoviePilot 媒体库取得 TMDB ID，返回 (ID, 来源)
+        """
+        if info.tmdbid:
+            return info.tmdbid, "目录名"
+        if series_path:
+            tmdbid = read_nfo_tmdbid(series_path)
+            if tmdbid:
+                return tmdbid, "tvshow.nfo"
+        try:
+            item = MediaServerOper().exists(title=info.title, year=info.year, mtype=MediaType.TV.value)
+        except Exception as e:
+            logger.debug(f"查询媒体库 {info.title} 失败: {e}")
+            item = None
+        if item and item.tmdbid:
+            return int(item.tmdbid), "媒体库"
+        return None, ""
+
+    def _search_tmdbid(self, info: FolderInfo) -> Optional[int]:
+        """
+        按标题搜索剧集，目录名带年份时先按首播年份过滤，选出标题和年份一致的结果
+        """
+        params = {"api_key": self._tmdb_api_key, "query": info.title}
+        results = []
+        if info.year:
+            results = self._client.get("/search/tv", dict(params, first_air_date_year=info.year)).get("results", [])
+        if not results:
+            results = self._client.get("/search/tv", params).get("results", [])
+        result = pick_result(results, info.title, info.year)
+        return result.get("id") if result else None
+
+    def _cache_put(self, key: str, tmdbid: Optional[int], state: str, status: Optional[str] = None):
+        if self._cache:
+            self._cache.put(key, tmdbid, state, status)
+
+    def _cache_error(self, key: str, series_name: str, stop: threading.Event):
+        """
+        记录查询失败，退避期过后重试；扫描已停止时的失败不记录
+        """
+        if self._cache and not stop.is_set():
+            backoff = self._cache.put_error(key)
+            logger.info(f"剧集 {series_name} 将在 {backoff / 60:.0f} 分钟后重试")
+
+    @staticmethod
+    def _parse_days(value: Any, default: float) -> float:
+        try:
+            return max(0.0, float(value))
+        except (TypeError, ValueError):
+            return default
+
     # 发送通知
     def send_notify(self, msg: str):
         try:
@@ -133,6 +328,13 @@ class MoveCompletedSeries(_PluginBase):
 
     # 停止服务
     def stop_service(self):
+        self._event.set()
+        if self._cache:
+            self._cache.close()
+            self._cache = None
+        if self._client:
+            self._client.close()
+            self._client = None
         try:
             self.remove_job("move_completed_series")
             logger.info("完结剧集搬运插件停止成功")
@@ -224,7 +426,7 @@ class MoveCompletedSeries(_PluginBase):
                                         'props': {
                                             'model': 'tmdb_api_key',
                                             'label': 'TMDB API密钥',
-                                            'placeholder': '输入TMDB API密钥'
+                                            'placeholder': '仅直连 TMDB 后备查询时使用'
                                         }
                                     }
                                 ]
@@ -266,6 +468,112 @@ class MoveCompletedSeries(_PluginBase):
                                         }
                                     }
                                 ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSwitch',
+                                        'props': {
+                                            'model': 'raw_fallback',
+                                            'label': '识别失败时直连TMDB',
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'workers',
+                                            'label': '并发查询数',
+                                            'placeholder': '8'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'rate_limit',
+                                            'label': '直连TMDB每秒请求数',
+                                            'placeholder': '仅限直连后备请求，默认10，0 为不限速'
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'ttl_ended',
+                                            'label': '已完结缓存天数',
+                                            'placeholder': '30'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'ttl_returning',
+                                            'label': '连载中缓存天数',
+                                            'placeholder': '1'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'ttl_not_found',
+                                            'label': '未找到缓存天数',
+                                            'placeholder': '7'
+                                        }
+                                    }
+                                ]
                             }
                         ]
                     }
@@ -276,13 +584,28 @@ class MoveCompletedSeries(_PluginBase):
             'source_dir': '/media/TVShows',
             'dest_dir': '/media/CompletedTVShows',
             'tmdb_api_key': '',
+            'raw_fallback': False,
             'cron': '0 3 * * *',
-            'enable_notify': False
+            'enable_notify': False,
+            'workers': 8,
+            'rate_limit': 10,
+            'ttl_ended': 30,
+            'ttl_returning': 1,
+            'ttl_not_found': 7
         }
     
     # 返回API接口
     def get_api(self) -> List[Dict[str, Any]]:
-        return []
+        return [{
+            "path": "/metrics",
+            "endpoint": self.get_metrics,
+            "methods": ["GET"],
+            "summary": "直连请求统计",
+            "description": "获取最近一次扫描中直连 TMDB 后备请求的次数、重试和耗时统计，内置识别的查询不计入；未开启直连后备时为空",
+        }]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return self._client.metrics.to_dict() if self._client else {}
     
     # 返回插件页面
     def get_page(self) -> List[Dict[str, Any]]:
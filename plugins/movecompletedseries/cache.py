@@ -0,0 +1,110 @@
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+# 缓存状态：已完结、连载中、TMDB 未找到、查询出错
+ENDED = "ended"
+RETURNING = "returning"
+NOT_FOUND = "not_found"
+ERROR = "error"
+
+# 查询出错后的重试退避：首次 10 分钟，之后每次翻倍，最长 1 天
+_ERROR_BACKOFF = 600
+_ERROR_BACKOFF_MAX = 86400
+
+
+class CacheEntry(NamedTuple):
+    tmdbid: Optional[int]
+    state: str
+    status: Optional[str]
+
+
+def name_key(name: str) -> str:
+    """
+    按规范化后的剧集名生成缓存键：全角转半角、合并空白、忽略大小写
+    """
+    name = unicodedata.normalize("NFKC", name)
+    return "name:" + re.sub(r"\s+", " ", name).strip().lower()
+
+
+def id_key(tmdbid: int) -> str:
+    return f"tmdb:{tmdbid}"
+
+
+class StatusCache:
+    """
+    剧集完结状态缓存，保存在插件数据目录下的 SQLite 文件中，插件重载和重启后仍然有效
+    同一结果同时按剧集名和 TMDB ID 记录；已完结、连载中、未找到分别使用不同的有效期，
+    查询出错也会缓存，按连续失败次数指数退避，退避期内不再请求；
+    条目数超过上限时按最近访问时间淘汰
+    """
+
+    def __init__(self, db_path: Path, ttl_ended: float, ttl_returning: float, ttl_not_found: float,
+                 max_entries: int = 5000):
+        self._ttls = {ENDED: ttl_ended, RETURNING: ttl_returning, NOT_FOUND: ttl_not_found}
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS status (key TEXT PRIMARY KEY, tmdbid INTEGER, "
+                           "state TEXT, status TEXT, failures INTEGER, expires REAL, accessed REAL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS status_accessed ON status (accessed)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        返回未过期的缓存条目，没有或已过期时返回 None；出错条目在退避期内同样返回
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT tmdbid, state, status, expires FROM status WHERE key = ?",
+                                     (key,)).fetchone()
+            if row is None or row[3] <= now:
+                return None
+            self._conn.execute("UPDATE status SET accessed = ? WHERE key = ?", (now, key))
+        return CacheEntry(row[0], row[1], row[2])
+
+    def put(self, key: str, tmdbid: Optional[int], state: str, status: Optional[str] = None):
+        """
+        记录查询成功的结果，有 TMDB ID 时同时按 ID 记录，连续失败次数清零
+        """
+        now = time.time()
+        row = (tmdbid, state, status, 0, now + self._ttls[state] * 86400, now)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO status (key, tmdbid, state, status, failures, expires, "
+                               "accessed) VALUES (?, ?, ?, ?, ?, ?, ?)", (key,) + row)
+            if tmdbid:
+                self._conn.execute("INSERT OR REPLACE INTO status (key, tmdbid, state, status, failures, "
+                                   "expires, accessed) VALUES (?, ?, ?, ?, ?, ?, ?)", (id_key(tmdbid),) + row)
+
+    def put_error(self, key: str) -> float:
+        """
+        记录一次查询失败，返回下次重试前的退避秒数
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT failures FROM status WHERE key = ? AND state = ?",
+                                     (key, ERROR)).fetchone()
+            failures = (row[0] if row else 0) + 1
+            backoff = min(_ERROR_BACKOFF * 2 ** (failures - 1), _ERROR_BACKOFF_MAX)
+            self._conn.execute("INSERT OR REPLACE INTO status (key, tmdbid, state, status, failures, expires, "
+                               "accessed) VALUES (?, NULL, ?, NULL, ?, ?, ?)",
+                               (key, ERROR, failures, now + backoff, now))
+        return backoff
+
+    def flush(self):
+        """
+        提交写入并淘汰超出上限的最久未访问条目，每次扫描结束时调用
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM status WHERE key IN (SELECT key FROM status "
+                               "ORDER BY accessed DESC LIMIT -1 OFFSET ?)", (self._max_entries,))
+            self._conn.commit()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
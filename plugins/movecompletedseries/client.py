@@ -0,0 +1,152 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .ratelimit import TokenBucket
+
+TMDB_API = "https://api.themoviedb.org/3"
+
+
+class RequestMetrics:
+    """
+    单次扫描中直连 TMDB 后备请求的统计：请求数、失败数、重试数、429 次数和每次请求的耗时
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.throttled = 0
+        self._latencies: List[float] = []
+
+    def record(self, latency: float, ok: bool = True, retry: bool = False, throttled: bool = False):
+        with self._lock:
+            self.requests += 1
+            self._latencies.append(latency)
+            if not ok:
+                self.errors += 1
+            if retry:
+                self.retries += 1
+            if throttled:
+                self.throttled += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            data = {
+                "started": self.started,
+                "requests": self.requests,
+                "errors": self.errors,
+                "retries": self.retries,
+                "throttled": self.throttled,
+            }
+        if latencies:
+            data.update({
+                "latency_avg_ms": round(sum(latencies) / len(latencies) * 1000, 1),
+                "latency_p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+                "latency_p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+                "latency_max_ms": round(latencies[-1] * 1000, 1),
+            })
+        return data
+
+    def summary(self) -> str:
+        data = self.to_dict()
+        text = f"直连 TMDB 请求 {data['requests']} 次，失败 {data['errors']} 次，重试 {data['retries']} 次，限流 {data['throttled']} 次"
+        if data["requests"]:
+            text += f"，耗时平均 {data['latency_avg_ms']}ms / P95 {data['latency_p95_ms']}ms / 最长 {data['latency_max_ms']}ms"
+        return text
+
+
+class TmdbClient:
+    """
+    插件共用的 TMDB 客户端：一个 requests.Session，连接池大小与并发线程数一致，连接保持复用，
+    预热后每次查询只需一个往返
+    每次请求前从全局令牌桶取令牌；429 按 Retry-After 暂停整个令牌桶后重试，
+    5xx 和网络错误按带随机抖动的指数退避重试
+    """
+
+    # 退避基数与上限（秒）
+    _BACKOFF_BASE = 1.0
+    _BACKOFF_MAX = 30.0
+
+    def __init__(self, limiter: TokenBucket, stop: threading.Event, pool_size: int = 8,
+                 retries: int = 3, timeout: float = 10):
+        self._limiter = limiter
+        self._stop = stop
+        self._retries = retries
+        self._timeout = timeout
+        self.metrics = RequestMetrics()
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def get(self, path: str, params: Optional[dict] = None) -> dict:
+        """
+        请求 TMDB 接口并返回 JSON，404 返回错误信息 JSON，其他请求失败或重试用尽时抛出异常
+        """
+        attempt = 0
+        while True:
+            if not self._limiter.acquire(self._stop):
+                raise RuntimeError("插件已停止")
+            started = time.perf_counter()
+            try:
+                r = self._session.get(TMDB_API + path, params=params, timeout=self._timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.metrics.record(time.perf_counter() - started, ok=False, retry=attempt < self._retries)
+                if attempt >= self._retries:
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                latency = time.perf_counter() - started
+                if r.status_code == 429:
+                    self.metrics.record(latency, ok=False, retry=attempt < self._retries, throttled=True)
+                    if attempt >= self._retries:
+                        r.raise_for_status()
+                    delay = self._retry_after(r) or self._backoff(attempt)
+                    # 限流是全局的，暂停所有线程的请求，下次取令牌时等待
+                    self._limiter.pause(delay)
+                    delay = 0
+                elif r.status_code >= 500:
+                    self.metrics.record(latency, ok=False, retry=attempt < self._retries)
+                    if attempt >= self._retries:
+                        r.raise_for_status()
+                    delay = self._backoff(attempt)
+                else:
+                    self.metrics.record(latency, ok=r.ok or r.status_code == 404)
+                    if r.status_code != 404:
+                        r.raise_for_status()
+                    return r.json()
+            attempt += 1
+            if self._stop.wait(delay):
+                raise RuntimeError("插件已停止")
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self._BACKOFF_MAX, self._BACKOFF_BASE * 2 ** attempt))
+
+    @staticmethod
+    def _retry_after(r: requests.Response) -> Optional[float]:
+        """
+        解析 Retry-After 头，支持秒数和 HTTP 日期两种格式
+        """
+        value = r.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def close(self):
+        self._session.close()
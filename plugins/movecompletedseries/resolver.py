@@ -0,0 +1,63 @@
+import os
+import re
+from typing import NamedTuple, Optional
+
+# 重命名后目录名中的 {tmdbid=12345}、[tmdbid=12345]、[tmdb-12345] 等标记
+_TMDBID_TAG = re.compile(r"[\[{]\s*tmdb(?:id)?\s*[=\-:]\s*(\d+)\s*[\]}]", re.IGNORECASE)
+_ANY_TAG = re.compile(r"[\[{][^\]}]*[\]}]")
+_TITLE_YEAR = re.compile(r"^(.*?)\s*[(（](\d{4})[)）]\s*$")
+# tvshow.nfo 中的 TMDB ID：Kodi/Emby 的 uniqueid、tmdbid 节点或 TMDB 链接
+_NFO_PATTERNS = (
+    re.compile(r"<uniqueid[^>]*type=\"tmdb\"[^>]*>\s*(\d+)\s*</uniqueid>", re.IGNORECASE),
+    re.compile(r"<tmdbid>\s*(\d+)\s*</tmdbid>", re.IGNORECASE),
+    re.compile(r"themoviedb\.org/tv/(\d+)", re.IGNORECASE),
+)
+# 只读取 NFO 开头这些字节，避免网盘上的大文件拖慢查询
+_NFO_READ_SIZE = 64 * 1024
+
+
+class FolderInfo(NamedTuple):
+    title: str
+    year: Optional[str]
+    tmdbid: Optional[int]
+
+
+def parse_folder(name: str) -> FolderInfo:
+    """
+    从剧集目录名中解析标题、年份和 TMDB ID，例如 “黑镜 (2011) {tmdbid=42009}”
+    """
+    match = _TMDBID_TAG.search(name)
+    tmdbid = int(match.group(1)) if match else None
+    title = _ANY_TAG.sub(" ", name).strip()
+    match = _TITLE_YEAR.match(title)
+    if match and match.group(1):
+        return FolderInfo(match.group(1).strip(), match.group(2), tmdbid)
+    return FolderInfo(title or name, None, tmdbid)
+
+
+def read_nfo_tmdbid(series_path: str) -> Optional[int]:
+    """
+    从剧集目录下的 tvshow.nfo 读取 TMDB ID，没有 NFO 或其中没有 ID 时返回 None
+    """
+    try:
+        with open(os.path.join(series_path, "tvshow.nfo"), "r", encoding="utf-8", errors="ignore") as f:
+            content = f.read(_NFO_READ_SIZE)
+    except OSError:
+        return None
+    for pattern in _NFO_PATTERNS:
+        match = pattern.search(content)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def pick_result(results: list, title: str, year: Optional[str]) -> Optional[dict]:
+    """
+    从搜索结果中选出标题（或原标题）与年份都一致的条目，没有时退回第一条
+    """
+    normalized = title.casefold()
+    for result in results:
+        names = {str(result.get("name") or "").casefold(), str(result.get("original_name") or "").casefold()}
+        if normalized in names and (not year or str(result.get("first_air_date") or "").startswith(year)):
+            return result
+    return results[0] if results else None